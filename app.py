@@ -4,7 +4,7 @@ import glm
 import configparser as cfg
 import utils
 import numpy as np
-from typing import Tuple
+from typing import List, Set, Tuple
 
 from PyQt6.QtWidgets import QApplication, QMainWindow
 from PyQt6.QtOpenGLWidgets import QOpenGLWidget
@@ -14,6 +14,9 @@ from OpenGL.GL import *
 
 from engine.shader import Shader, Program
 from engine.game_logic import GameLogic
+from engine.fixed_step import FixedStepClock
+from engine.tracing import TRACER
+from engine.gpu_profiler import GPUProfiler
 import geometry as geom
 
 RENDER_MODES = {0: GL_POINT, 1:GL_LINE, 2:GL_FILL}
@@ -31,6 +34,19 @@ class GLWidget(QOpenGLWidget):
         # 0: points, 1: wireframe, 2: textured
         self.render_mode    = 2     
 
+        # Keyboard state, sampled once per simulation step
+        self._keys_held:        Set[Qt.Key]     = set()
+        self._keys_tapped:      Set[Qt.Key]     = set()
+        self._keys_released:    List[Qt.Key]    = []
+
+        # The simulation runs in fixed steps, frames are drawn at 'app_fps' in between
+        self.clock          = FixedStepClock(1 / configs.getint("sim_rate"), configs.getint("sim_max_steps"))
+
+        # Spans of the frame stages, near free while disabled
+        TRACER.configure(configs.getint("trace_window"), configs.getfloat("trace_stutter_factor"), configs.getint("trace_max_events"))
+        TRACER.enabled      = configs.getboolean("trace_enabled")
+        self.gpu_profiler   = GPUProfiler(configs.getboolean("gpu_profiler"), configs.getint("gpu_profiler_latency"), configs.getint("gpu_profiler_window"))
+
         # App Timers
         self.timer          = QTimer(self)
         self.timer.timeout.connect(self.update_logic)
@@ -50,6 +66,34 @@ class GLWidget(QOpenGLWidget):
         print("FPS: {}".format(self._fps))
         self._fps = 0
 
+        print("Simulation: {} steps, {:.3f} s dropped".format(self.clock.steps, self.clock.dropped))
+        self.clock.steps    = 0
+        self.clock.dropped  = 0.0
+
+        for level, stats in self.logic.tile_cache.stats.items():
+            print("Tile Cache {}: {} tiles, {:.1f} MB, hits: {}, misses: {}, evictions: {}".format(
+                level.upper(), stats["entries"], stats["bytes"] / 2**20, stats["hits"], stats["misses"], stats["evictions"]))
+
+        stats = self.logic.frustum.stats
+        print("Tile Culling: reused {} of {} frames".format(stats["hits"], stats["hits"] + stats["misses"]))
+
+        print("Object Culling: " + ", ".join("{} {} drawn, {} culled".format(name, stats["drawn"], stats["culled"])
+                                             for name, stats in self.logic.culler.stats.items()))
+        self.logic.culler.reset_stats()
+
+        if TRACER.enabled:
+            for name, stats in TRACER.stats.items():
+                print("Trace {}: p50 {:.2f} ms, p95 {:.2f} ms, p99 {:.2f} ms over {}{}".format(
+                    name, stats["p50"], stats["p95"], stats["p99"], stats["count"],
+                    ", {} stutters".format(stats["stutters"]) if "stutters" in stats else ""))
+
+        if self.gpu_profiler.enabled:
+            for name, stats in self.gpu_profiler.stats.items():
+                print("GPU {}: {:.3f} ms GPU, {:.3f} ms CPU".format(name, stats["gpu"], stats["cpu"]))
+            print("GPU Profiler: {} results not ready in time, {} invalid".format(self.gpu_profiler.dropped, self.gpu_profiler.invalid))
+            self.gpu_profiler.dropped   = 0
+            self.gpu_profiler.invalid   = 0
+
 
     def _setup_initial_rendering(self):
         bg_color = utils.parse_list(self.configs["clear_color"], float)
@@ -94,8 +138,37 @@ class GLWidget(QOpenGLWidget):
         glDisable(GL_CULL_FACE)
 
 
+    def _paint_overlay(self):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+        painter.setPen(QColor(255, 120, 128))
+        painter.setFont(QFont("Arial", 30))
+        text    = "Reach '{}, {}'".format(self.logic.mission.target.name, self.logic.mission.target.country)
+        width   = painter.fontMetrics().horizontalAdvance(text)
+        x_pos   = configs.getint("window_width") // 2 - width // 2
+        y_pos   = configs.getint("window_height") - 20
+        painter.drawText(x_pos, y_pos, text)
+
+        selected = self.logic.selected_airport
+        if selected is not None:
+            painter.setFont(QFont("Arial", 16))
+            distance = glm.length(glm.vec2(selected.position) - glm.vec2(self.logic.air_plane.position))
+            painter.drawText(20, 40, "Selected '{}, {}' ({:.3f} away)".format(selected.name, selected.country, distance))
+        painter.end()
+
+
     # === Private Key Interaction Methods ===
 
+    def _process_input(self):
+        """Held keys and keys tapped since the last step act once, then releases are applied in order."""
+        for key in self._keys_held | self._keys_tapped:
+            self.delegate_key_pressed(key)
+        for key in self._keys_released:
+            self.delegate_key_released(key)
+        self._keys_tapped   = set()
+        self._keys_released = []
+
+
     def _zoom(self, direction: int):
         """
         Zoom in or out based on direction.
@@ -116,16 +189,20 @@ class GLWidget(QOpenGLWidget):
     # === Public Methods ===
 
     def update_logic(self):
-        delta      = self.elapsed_timer.elapsed() / 1000.0
+        elapsed     = self.elapsed_timer.nsecsElapsed() / 1e9
         self.elapsed_timer.restart()
-        self.logic.update(delta)    # Trigger Logic
-        self.update()               # Trigger UI
+        for _ in range(self.clock.advance(elapsed)):
+            self._process_input()
+            self.logic.update(self.clock.step)     # Trigger Logic
+        self.logic.interpolate(self.clock.alpha)
+        self.update()                               # Trigger UI
         self._fps += 1
 
 
     def initializeGL(self):
         self._setup_initial_rendering()
         self._setup_shaders()
+        self.gpu_profiler.initializeGL()
 
         # Get uniform location
         uniform_names       = ["model", "view", "projection", "alpha"]
@@ -137,51 +214,89 @@ class GLWidget(QOpenGLWidget):
 
 
     def paintGL(self):
+        TRACER.frame()
+        self.gpu_profiler.begin_frame()
         self.program.use()
         self._setup_render_step()    
 
-        # === Stage 1: Render opaque objects ===
-        self._enable_opaque_rendering()
-
-        # Load required Map Tiles
+        # Load required Map Tiles and cull objects outside the view
         self.logic.map_tile_check()
+        with TRACER.span("cull"):
+            self.logic.visibility_check()
+            culler  = self.logic.culler
+            enemies = culler.cull_models("enemies", self.logic.enemies)
+            clouds  = culler.cull_models("clouds", self.logic.clouds.models)
+            targets = culler.cull("targets", *self.logic.targets.bounding_spheres)
+            rockets = culler.cull_models("rockets", self.logic.rockets)
+
+        # === Stage 1: Render opaque objects ===
+        with TRACER.span("opaque"), self.gpu_profiler.stage("opaque"):
+            self._enable_opaque_rendering()
+            for obj in [self.logic.air_plane] + enemies:
+                obj.render()      
 
-        for obj in [self.logic.air_plane] + self.logic.enemies + self.logic.tiles:
-            obj.render()      
+            # Map tiles are drawn in one call with their own shader program
+            self.logic.tile_renderer.render(self.logic.camera.view_matrix, self.logic.camera.projection_matrix)
+            self.program.use()
 
         # === Stage 2: Render Semi-Transparent objects ===
-        self._enable_transparent_rendering_cull()
-        for obj in self.logic.bl_clouds + self.logic.wh_clouds + self.logic.targets:
-            obj.render()
+        with TRACER.span("transparent"), self.gpu_profiler.stage("transparent"):
+            self._enable_transparent_rendering_cull()
+            # Clouds are merged into one draw call per texture and map cell
+            self.logic.clouds.render(clouds)
+
+            # Visible targets are drawn in one instanced call and spin in the shader
+            self.logic.targets.render(self.logic.camera.view_matrix, self.logic.camera.projection_matrix, self.logic.time, targets)
+            self.program.use()
 
         # === Stage 3: Render Semi-Transparent objects without face culling ===
-        self._enable_transparent_rendering_no_cull()
-        for obj in self.logic.rockets + self.logic.strips:
-            obj.render()
+        with TRACER.span("no-cull"), self.gpu_profiler.stage("no-cull"):
+            self._enable_transparent_rendering_no_cull()
+            for obj in rockets:
+                obj.render()
+
+            # The contrail is one ring buffer, drawn in one call with its own shader program
+            self.logic.contrail.render(self.logic.camera.view_matrix, self.logic.camera.projection_matrix)
+            self.program.use()
 
         # === Stage 4: Render Overlays ===
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
-        painter.setPen(QColor(255, 120, 128))
-        painter.setFont(QFont("Arial", 30))
-        text    = "Reach '{}, {}'".format(self.logic.mission.target.name, self.logic.mission.target.country)
-        width   = painter.fontMetrics().horizontalAdvance(text)
-        x_pos   = configs.getint("window_width") // 2 - width // 2
-        y_pos   = configs.getint("window_height") - 20
-        painter.drawText(x_pos, y_pos, text)
-        painter.end()
-        
+        with TRACER.span("overlay"), self.gpu_profiler.stage("overlay"):
+            self._paint_overlay()
+
 
     def resizeGL(self, w: int, h: int):
         glViewport(0, 0, w, h)
-        self.logic.camera.aspect = w/h
+        self.logic.resize(w, h)
 
 
     def release(self):
+        if TRACER.enabled:
+            self.export_trace()
+        self.gpu_profiler.release()
         self.program.release()
         self.logic.release()
 
 
+    def toggle_tracing(self):
+        TRACER.enabled = not TRACER.enabled
+        print("Tracing {}".format("enabled" if TRACER.enabled else "disabled"))
+
+
+    def export_trace(self):
+        path = self.configs.get("trace_file")
+        print("Wrote {} trace events to '{}'".format(TRACER.export_chrome(path), path))
+
+
+    def key_down(self, key: Qt.Key):
+        self._keys_held.add(key)
+        self._keys_tapped.add(key)
+
+
+    def key_up(self, key: Qt.Key):
+        self._keys_held.discard(key)
+        self._keys_released.append(key)
+
+
     def delegate_key_released(self, key: Qt.Key):
         if key in [Qt.Key.Key_W, Qt.Key.Key_S, Qt.Key.Key_Shift]:
             self.logic.air_plane.accelerate(0)
@@ -249,6 +364,12 @@ class GLWidget(QOpenGLWidget):
         return glm.vec3(p_near), glm.vec3(p_far)
 
 
+    def delegate_pick(self, pos):
+        airport = self.logic.select_airport(*self.screen_ray(pos))
+        if airport is not None:
+            print("Selected '{}, {}'".format(airport.name, airport.country))
+
+
     def delegate_tilt(self, start_pos, end_pos):
 
         #dx = end_pos.x() - start_pos.x()
@@ -274,36 +395,30 @@ class MainWindow(QMainWindow):
         self.gl_widget = GLWidget(configs)
         self.setCentralWidget(self.gl_widget)
 
-        # When a pressed key is considered held is OS dependent. Avoid this break by start as soon as a key is pressed.
-        self.keys_held          = set()
-        self.timer = QTimer()
-        self.timer.timeout.connect(self._process_held_keys)
-        print(1000 // self.configs.getfloat("app_fps"))
-        self.timer.start(1000 // self.configs.getint("app_fps"))
-
         # Variables for user interaction
         self.last_mouse_pos     = None
         self.left_mouse_down    = False
         self.middle_mouse_down  = False
 
 
-    def _process_held_keys(self):
-        for key in self.keys_held:
-            self.gl_widget.delegate_key_pressed(key)
-
-
     def keyPressEvent(self, event):
+        # When a pressed key is considered held is OS dependent, keys act from the first press until released instead
+        if event.isAutoRepeat():
+            return
         key = event.key()
         if key == Qt.Key.Key_Escape:
             self.close()
-        self.keys_held.add(key)
+        elif key == Qt.Key.Key_F8:
+            self.gl_widget.toggle_tracing()
+        elif key == Qt.Key.Key_F9:
+            self.gl_widget.export_trace()
+        self.gl_widget.key_down(key)
 
 
     def keyReleaseEvent(self, event):
-        key = event.key()
-        if key in self.keys_held:
-            self.keys_held.remove(key)
-            self.gl_widget.delegate_key_released(key)
+        if event.isAutoRepeat():
+            return
+        self.gl_widget.key_up(event.key())
 
 
     def wheelEvent(self, event):
@@ -314,6 +429,7 @@ class MainWindow(QMainWindow):
         self.last_mouse_pos     = event.position()
         if event.button() == Qt.MouseButton.LeftButton:
             self.left_mouse_down    = True
+            self.gl_widget.delegate_pick(self.gl_widget.mapFrom(self, event.position()))
         elif event.button() == Qt.MouseButton.MiddleButton:
             self.middle_mouse_down  = True
 
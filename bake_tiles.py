@@ -0,0 +1,22 @@
+import os
+import argparse
+import configparser
+
+from engine.tile_pack import bake_pack, pack_path
+
+
+
+if __name__ == "__main__":
+
+    config = configparser.ConfigParser()
+    config.read("configs.ini")
+
+    parser = argparse.ArgumentParser(description="Bake a downloaded tile pyramid into one memory-mappable pack per zoom level.")
+    parser.add_argument("--tile_dir", default=config["DEFAULT"].get("tile_dir"), help="Root of the '{z}/{x}/{y}.png' pyramid")
+    parser.add_argument("--pack_dir", default=config["DEFAULT"].get("tile_pack_dir"), help="Output directory of the packs")
+    args = parser.parse_args()
+
+    for z in sorted(int(d) for d in os.listdir(args.tile_dir) if d.isdigit()):
+        no_tiles = bake_pack(args.tile_dir, args.pack_dir, z)
+        size_mb  = os.path.getsize(pack_path(args.pack_dir, z)) / 2**20
+        print("z-{}\t - tiles:\t{}\t, pack:\t{:.1f} MB".format(z, no_tiles, size_mb))
@@ -0,0 +1,55 @@
+"""
+Airport queries. Linear scans over the airport list against the KD-tree of
+AirportIndex for k-nearest, radius and ray-pick queries, on random airports
+spread over the map.
+
+    python -m benchmarks.airport_index [--sizes 1000 10000 100000]
+"""
+import glm
+import argparse
+import numpy as np
+
+from benchmarks.common import measure, print_table
+from geography import Airport, AirportIndex
+
+
+def nearest_linear(airports: list, position: tuple, k: int) -> list:
+    return sorted(airports, key=lambda airport: np.hypot(airport.position[0] - position[0], airport.position[1] - position[1]))[:k]
+
+
+def within_linear(airports: list, position: tuple, radius: float) -> list:
+    return [airport for airport in airports if np.hypot(airport.position[0] - position[0], airport.position[1] - position[1]) <= radius]
+
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="numbers of airports")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--radius", type=float, default=0.05)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    rng     = np.random.default_rng(0)
+    rows    = []
+    for size in args.sizes:
+        airports    = [Airport(str(i), tuple(position), "", "") for i, position in enumerate(rng.random((size, 2)) * 2 - 1)]
+        queries     = [tuple(position) for position in rng.random((args.queries, 2)) * 2 - 1]
+        build       = measure(lambda: AirportIndex(airports), repeat = 3)["min"]
+        index       = AirportIndex(airports)
+
+        knn_linear  = measure(lambda: [nearest_linear(airports, q, args.k) for q in queries], repeat = 1)["min"] / args.queries
+        knn_tree    = measure(lambda: [index.nearest(q, args.k) for q in queries], repeat = 3)["min"] / args.queries
+        rad_linear  = measure(lambda: [within_linear(airports, q, args.radius) for q in queries], repeat = 1)["min"] / args.queries
+        rad_tree    = measure(lambda: [index.within(q, args.radius) for q in queries], repeat = 3)["min"] / args.queries
+
+        # Steep click rays through the query positions
+        rays        = [(glm.vec3(x + 0.01, y, 0.05), glm.vec3(x - 0.01, y, -0.05)) for x, y in queries]
+        pick        = measure(lambda: [index.pick(start, end, 0.02, 0.002) for start, end in rays], repeat = 3)["min"] / args.queries
+
+        ms          = lambda seconds: "{:.3f}".format(seconds * 1000)
+        rows.append([size, ms(build), ms(knn_linear), ms(knn_tree), "{:.0f}x".format(knn_linear / knn_tree),
+                     ms(rad_linear), ms(rad_tree), "{:.0f}x".format(rad_linear / rad_tree), ms(pick)])
+
+    print_table(["airports", "build ms", "knn scan ms", "knn ms", "speedup", "radius scan ms", "radius ms", "speedup", "pick ms"], rows)
@@ -0,0 +1,113 @@
+"""
+Build time and draw calls of the cloud field against the former build of
+one model per cloud: the per-sphere Cloud geometry and the per-vertex VAO
+loop, copied below. Draw calls are reported in a table of their own.
+
+    python -m benchmarks.cloud_field [--counts 110 1000 5000]
+"""
+import argparse
+import configparser
+import numpy as np
+
+import utils
+from benchmarks.common import measure, print_table
+from engine.cloud_field import CloudField
+
+
+def former_sphere(lat_divs: int = 4, lon_divs: int = 8):
+    """The former Sphere._generate_geometry, returns (vertices, indices, uv_vertices)."""
+    vertices    = []
+    indices     = []
+    uv_vertices = []
+
+    for i in range(lat_divs + 1):
+        theta       = np.pi * i / lat_divs
+        sin_theta   = np.sin(theta)
+        cos_theta   = np.cos(theta)
+
+        for j in range(lon_divs + 1):
+            phi     = 2 * np.pi * j / lon_divs
+            sin_phi = np.sin(phi)
+            cos_phi = np.cos(phi)
+
+            x = sin_theta * cos_phi * 0.5
+            y = cos_theta * 0.5
+            z = sin_theta * sin_phi * 0.5
+
+            vertices.extend([x, z, y])
+            uv_vertices.append([j / lon_divs, i / lat_divs])
+
+    for i in range(lat_divs):
+        for j in range(lon_divs):
+            first = i * (lon_divs + 1) + j
+            second = first + lon_divs + 1
+
+            indices.extend([first, second, first + 1])
+            indices.extend([second, second + 1, first + 1])
+
+    return np.array(vertices, dtype=np.float32), np.array(indices, dtype=np.uint32), np.array(uv_vertices, dtype=np.float32)
+
+
+def former_cloud_vertex_data(min_spheres: int, max_spheres: int, min_radius: float, max_radius: float, max_offset_xy: float, max_offset_z: float) -> np.ndarray:
+    """The former Cloud.__init__ followed by the former per-vertex VAO.__init__."""
+    no_spheres  = np.random.randint(min_spheres, max_spheres)
+    radius      = np.random.random(no_spheres) / (max_radius - min_radius) + min_radius
+    offset      = np.random.random((no_spheres, 3)) * np.array([max_offset_xy, max_offset_xy, max_offset_z])
+
+    vertices    = []
+    indices     = []
+    uv_vertices = []
+
+    sphere_vertices, sphere_indices, sphere_uvs = former_sphere()
+
+    for i in range(no_spheres):
+        vert = np.reshape(sphere_vertices, (-1, 3)) * radius[i] + offset[i]
+        vertices.extend(vert)
+        uv_vertices.extend(sphere_uvs)
+        indices.extend(len(vert) * i + sphere_indices)
+
+    vertices        = np.array(vertices, dtype=np.float32)
+    uv_vertices     = np.array(uv_vertices, dtype=np.float32)
+    indices         = np.array(indices, dtype=np.uint32)
+
+    vertex_data = []
+    for f_idx, uv_idx in zip(indices.flatten(), indices.flatten()):
+        vertex_data.append(np.concatenate([vertices[f_idx], uv_vertices[uv_idx]]))
+    return np.array(vertex_data, dtype=np.float32)
+
+
+
+if __name__ == "__main__":
+
+    config = configparser.ConfigParser()
+    config.read("configs.ini")
+    configs = config["DEFAULT"]
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--counts", type=int, nargs="+", default=[110, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    params = dict(
+        min_spheres     = configs.getint("cloud_min_spheres"),
+        max_spheres     = configs.getint("cloud_max_spheres"),
+        min_radius      = configs.getfloat("cloud_min_rad"),
+        max_radius      = configs.getfloat("cloud_max_rad"),
+        max_offset_xy   = configs.getfloat("cloud_max_off_xy"),
+        max_offset_z    = configs.getfloat("cloud_max_off_z")
+    )
+    scale   = np.array(utils.parse_list(configs["cloud_scale"], float), dtype=np.float32)
+    groups  = lambda n: {configs.get("cloud_tex_black"): n // 11, configs.get("cloud_tex_white"): n - n // 11}
+
+    build_rows  = []
+    draw_rows   = []
+    for count in args.counts:
+        former      = measure(lambda: [former_cloud_vertex_data(**params) for _ in range(count)], repeat = args.repeat, number = 1)["min"]
+        field_time  = measure(lambda: CloudField(groups(count), scale, configs.getfloat("cloud_max_height"), **params), repeat = args.repeat, number = 1)["min"]
+        field       = CloudField(groups(count), scale, configs.getfloat("cloud_max_height"), **params)
+        build_rows.append([count, "{:.1f}".format(former * 1000), "{:.1f}".format(field_time * 1000), "{:.0f}x".format(former / field_time)])
+        draw_rows.append([count, count, len(field.models)])
+
+    print_table(["clouds", "former ms", "field ms", "speedup"], build_rows)
+    print()
+    print_table(["clouds", "former draws", "field draws"], draw_rows)
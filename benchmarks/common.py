@@ -0,0 +1,32 @@
+import time
+import statistics
+from typing import Callable, Dict
+
+
+def measure(fn: Callable[[], object], repeat: int = 5, number: int = 1) -> Dict[str, float]:
+    """Call 'fn' 'number' times in each of 'repeat' rounds. Returns the seconds per call."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    return {"min": min(times), "median": statistics.median(times)}
+
+
+def print_table(header: list, rows: list):
+    widths = [max(len(str(row[i])) for row in [header] + rows) for i in range(len(header))]
+    for row in [header] + rows:
+        print("  ".join(str(cell).ljust(width) for cell, width in zip(row, widths)))
+
+
+def calibrate(fn: Callable[[], object], min_seconds: float = 0.02) -> int:
+    """Number of calls per round so that one round takes at least 'min_seconds'."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= min_seconds or number >= 1 << 20:
+            return number
+        number *= 4
@@ -0,0 +1,149 @@
+"""
+Quadtree tile culling. The former recursive culler with its distance
+heuristic (res_multiplier) against the compiled breadth-first traversal
+with screen-space-error LOD, for several camera heights, tile_max_z and
+tilts. Sharpness is given as the most screen pixels one texel of a tile
+covers, the new LOD is also run at the worst px/texel of the former result
+to compare tile counts at equal sharpness. Then the share of frames of a scripted flight that reuse the last
+result.
+
+    python -m benchmarks.frustum_cull [--max-z 6 10 14] [--texel-ratio 5]
+"""
+import glm
+import argparse
+import configparser
+import numpy as np
+
+import geometry as geom
+from benchmarks.common import measure, print_table
+from engine.camera import PivotCamera
+from engine.frustum import Frustum
+from engine.tile_loader import TILE_SIZE
+
+
+def cull_recursive(max_z: int, res_multiplier: float, vp_matrix: glm.mat4, cam_pos: glm.vec3) -> set:
+    """The former recursive Frustum.cull, one compiled intersection call per visited tile."""
+    inv_viewproj    = glm.inverse(vp_matrix)
+    frustum_points  = np.array([geom.ray_z_plane_intersection(inv_viewproj, u, v) for u, v in [(-1, -1), (-1, 1), (1, 1), (1, -1)]])
+
+    def test_plane(x, y, z):
+        tile_size   = 2.0 / (2 ** z)
+        min_x       = -1.0 + y * tile_size
+        max_x       = min_x + tile_size
+        max_y       = 1 - x * tile_size
+        min_y       = max_y - tile_size
+        tile_points = np.array([(min_x, min_y), (max_x, min_y), (max_x, max_y), (min_x, max_y)])
+
+        if not geom.test_plane_intersection_2d(tile_points, frustum_points):
+            return []
+        if cam_pos.z > tile_size or z == max_z:
+            return [(x, y, z)]
+        center = glm.vec3(min_x + tile_size / 2, min_y + tile_size / 2, 0)
+        if glm.length(cam_pos - center) > res_multiplier * tile_size:
+            return [(x, y, z)]
+        return [tile for x_ in (2 * x, 2 * x + 1) for y_ in (2 * y, 2 * y + 1) for tile in test_plane(x_, y_, z + 1)]
+
+    return set(test_plane(0, 0, 0))
+
+
+def worst_texel_size(tiles: set, cam_pos: glm.vec3, pixels_per_unit: float, max_z: int) -> float:
+    """Largest number of screen pixels covered by one texel of a tile that could still be refined."""
+    worst = 0.0
+    for x, y, z in tiles:
+        if z == max_z:
+            continue
+        size    = 2.0 / (2 ** z)
+        min_x   = -1.0 + y * size
+        max_y   = 1.0 - x * size
+        dx      = max(min_x - cam_pos.x, 0, cam_pos.x - min_x - size)
+        dy      = max(max_y - size - cam_pos.y, 0, cam_pos.y - max_y)
+        worst   = max(worst, size * pixels_per_unit / np.sqrt(dx * dx + dy * dy + cam_pos.z ** 2) / TILE_SIZE)
+    return worst
+
+
+
+if __name__ == "__main__":
+
+    config = configparser.ConfigParser()
+    config.read("configs.ini")
+    configs = config["DEFAULT"]
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--heights", type=float, nargs="+", default=[0.001, 0.01, 0.05, 0.3, 1.0], help="camera distances to the pivot")
+    parser.add_argument("--max-z", type=int, nargs="+", default=[6, 10, 14])
+    parser.add_argument("--tilts", type=float, nargs="+", default=[0, 30, 50, 65, 70, 75])
+    parser.add_argument("--res-multiplier", type=float, default=3, help="distance factor of the former heuristic")
+    parser.add_argument("--texel-ratio", type=float, default=configs.getfloat("lod_texel_ratio"), help="px / texel of the new LOD, defaults to lod_texel_ratio")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    def make_frustum(max_z: int, tolerance: float = 0.0, texel_ratio: float = args.texel_ratio) -> Frustum:
+        return Frustum(max_z, configs.getfloat("cam_fov"), configs.getint("window_height"),
+                       texel_ratio, configs.getfloat("horizon_distance"), tolerance)
+
+    def make_camera(height: float, tilt_deg: float) -> PivotCamera:
+        return PivotCamera(
+            pivot_point = glm.vec3(0.137, 0.562, 0),
+            tilt_deg    = tilt_deg,
+            distance    = height,
+            fov_deg     = configs.getfloat("cam_fov"),
+            aspect      = configs.getint("window_width") / configs.getint("window_height"),
+            near        = configs.getfloat("cam_near"),
+            far         = configs.getfloat("cam_far")
+        )
+
+    pixels_per_unit = configs.getint("window_height") / (2 * np.tan(np.radians(configs.getfloat("cam_fov")) / 2))
+    texel_size      = lambda tiles, camera, max_z: "{:.2f}".format(worst_texel_size(tiles, camera.cam_pos, pixels_per_unit, max_z))
+
+    def equal_sharpness(former: set, camera: PivotCamera, max_z: int, vp_matrix: glm.mat4):
+        """Tiles of the new LOD at the worst px/texel of the former result, '-' if the former never stopped short of max_z."""
+        worst = worst_texel_size(former, camera.cam_pos, pixels_per_unit, max_z)
+        if worst == 0:
+            return "-"
+        return len(make_frustum(max_z, tolerance = -1, texel_ratio = worst).cull(vp_matrix, camera.cam_pos))
+
+    rows = []
+    for max_z in args.max_z:
+        frustum = make_frustum(max_z, tolerance = -1)
+        for height in args.heights:
+            camera      = make_camera(height, configs.getfloat("cam_tilt_deg"))
+            vp_matrix   = camera.projection_matrix * camera.view_matrix
+            former      = cull_recursive(max_z, args.res_multiplier, vp_matrix, camera.cam_pos)
+            tiles       = frustum.cull(vp_matrix, camera.cam_pos)
+
+            recursive   = measure(lambda: cull_recursive(max_z, args.res_multiplier, vp_matrix, camera.cam_pos), repeat = args.repeat)["min"]
+            batched     = measure(lambda: frustum.cull(vp_matrix, camera.cam_pos), repeat = args.repeat)["min"]
+            rows.append([max_z, height, len(former), texel_size(former, camera, max_z), "{:.2f}".format(recursive * 1000), 
+                         len(tiles), texel_size(tiles, camera, max_z), equal_sharpness(former, camera, max_z, vp_matrix),
+                         "{:.2f}".format(batched * 1000), "{:.1f}x".format(recursive / batched)])
+
+    print_table(["max z", "height", "former tiles", "px / texel", "former ms", "tiles", "px / texel", "at former px / texel", "ms", "speedup"], rows)
+
+    # Tile counts towards the horizon, the former footprint grows without bound
+    print()
+    rows = []
+    frustum = make_frustum(configs.getint("tile_max_z"), tolerance = -1)
+    for tilt in args.tilts:
+        camera      = make_camera(0.01, tilt)
+        vp_matrix   = camera.projection_matrix * camera.view_matrix
+        former      = cull_recursive(configs.getint("tile_max_z"), args.res_multiplier, vp_matrix, camera.cam_pos)
+        tiles       = frustum.cull(vp_matrix, camera.cam_pos)
+        rows.append([tilt, len(former), texel_size(former, camera, configs.getint("tile_max_z")), len(tiles), texel_size(tiles, camera, configs.getint("tile_max_z")),
+                     equal_sharpness(former, camera, configs.getint("tile_max_z"), vp_matrix)])
+    print_table(["tilt deg", "former tiles", "px / texel", "tiles", "px / texel", "at former px / texel"], rows)
+
+    # Frames parked on the runway followed by a climbing turn, with and without reusing the last result
+    print()
+    rows = []
+    for tolerance in [-1.0, configs.getfloat("cull_tolerance")]:
+        frustum = make_frustum(configs.getint("tile_max_z"), tolerance)
+        camera  = make_camera(0.01, configs.getfloat("cam_tilt_deg"))
+        def fly():
+            for frame in range(300):
+                if frame >= 200:
+                    camera.add_orbit(0.5)
+                    camera.distance = camera.distance * 1.001
+                frustum.cull(camera.projection_matrix * camera.view_matrix, camera.cam_pos)
+        seconds = measure(fly, repeat = 1)["min"]
+        rows.append([tolerance if tolerance >= 0 else "off", frustum.hits, frustum.misses, "{:.3f}".format(seconds / 300 * 1000)])
+    print_table(["tolerance", "reused", "culled", "ms / frame"], rows)
@@ -0,0 +1,70 @@
+"""
+Load times of a large synthetic OBJ: line by line parser, vectorized parser
+and the memory-mapped mesh cache of the next startup.
+
+    python -m benchmarks.obj_loading [--rings 400]
+"""
+import os
+import shutil
+import argparse
+import tempfile
+import numpy as np
+
+from benchmarks.common import measure, print_table
+from parser import OBJ_Parser, read_obj, read_obj_lines
+
+
+def write_sphere_obj(path: str, rings: int):
+    """UV sphere with 2 * rings segments, positions, uvs, normals and quad faces as v/t/n."""
+    segments    = 2 * rings
+    theta, phi  = np.meshgrid(np.linspace(0, np.pi, rings + 1), np.linspace(0, 2 * np.pi, segments + 1), indexing="ij")
+    normals     = np.stack([np.sin(theta) * np.cos(phi), np.sin(theta) * np.sin(phi), np.cos(theta)], axis=-1).reshape(-1, 3)
+    uvs         = np.stack([phi / (2 * np.pi), theta / np.pi], axis=-1).reshape(-1, 2)
+
+    first       = (np.arange(rings)[:, None] * (segments + 1) + np.arange(segments)).ravel() + 1
+    quads       = np.stack([first, first + segments + 1, first + segments + 2, first + 1], axis=1)
+
+    with open(path, "w") as f:
+        f.write("# synthetic sphere\n")
+        np.savetxt(f, normals * 0.5, fmt="v %.6f %.6f %.6f")
+        np.savetxt(f, uvs, fmt="vt %.6f %.6f")
+        np.savetxt(f, normals, fmt="vn %.6f %.6f %.6f")
+        np.savetxt(f, np.repeat(quads, 3, axis=1), fmt="f " + " ".join(["%d/%d/%d"] * 4))
+
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rings", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    work_dir    = tempfile.mkdtemp()
+    obj_path    = os.path.join(work_dir, "sphere.obj")
+    cache_dir   = os.path.join(work_dir, "cache")
+    write_sphere_obj(obj_path, args.rings)
+
+    def cold_start():
+        shutil.rmtree(cache_dir, ignore_errors = True)
+        OBJ_Parser(obj_path, cache_dir = cache_dir)
+
+    try:
+        cases = [
+            ("line by line",            lambda: read_obj_lines(obj_path)),
+            ("vectorized",              lambda: read_obj(obj_path)),
+            ("vectorized + cache write", cold_start),
+            ("cached (mmap)",           lambda: OBJ_Parser(obj_path, cache_dir = cache_dir)),
+        ]
+        OBJ_Parser(obj_path, cache_dir = cache_dir)
+
+        print("{:.1f} MB, {} triangle corners".format(os.path.getsize(obj_path) / 2**20, len(read_obj(obj_path)["vertex_indices"])))
+        rows    = []
+        base    = None
+        for name, fn in cases:
+            seconds = measure(fn, repeat = args.repeat)["min"]
+            base    = base or seconds
+            rows.append([name, "{:.1f}".format(seconds * 1000), "{:.0f}x".format(base / seconds)])
+        print_table(["loader", "ms", "speedup"], rows)
+    finally:
+        shutil.rmtree(work_dir)
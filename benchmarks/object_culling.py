@@ -0,0 +1,54 @@
+"""
+Object culling. Cost of culling N bounding spheres against the camera
+frustum and a max draw distance, and the share of objects left to draw,
+for objects spread over the map like targets and enemies.
+
+    python -m benchmarks.object_culling [--sizes 100 1000 10000]
+"""
+import glm
+import argparse
+import configparser
+import numpy as np
+
+from benchmarks.common import measure, print_table
+from engine.camera import PivotCamera
+from engine.visibility import VisibilityCuller
+
+
+
+if __name__ == "__main__":
+
+    config = configparser.ConfigParser()
+    config.read("configs.ini")
+    configs = config["DEFAULT"]
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="numbers of objects")
+    parser.add_argument("--heights", type=float, nargs="+", default=[0.01, 0.1, 1.0], help="camera distances to the pivot")
+    parser.add_argument("--max-distance", type=float, default=configs.getfloat("draw_distance_targets"))
+    args = parser.parse_args()
+
+    rng     = np.random.default_rng(0)
+    rows    = []
+    for size in args.sizes:
+        centers = np.hstack([rng.random((size, 2)) * 2 - 1, rng.random((size, 1)) * 0.02]).astype(np.float32)
+        radii   = np.full(size, 0.01, dtype=np.float32)
+        for height in args.heights:
+            camera  = PivotCamera(
+                pivot_point = glm.vec3(0.137, 0.562, 0),
+                tilt_deg    = configs.getfloat("cam_tilt_deg"),
+                distance    = height,
+                fov_deg     = configs.getfloat("cam_fov"),
+                aspect      = configs.getint("window_width") / configs.getint("window_height"),
+                near        = configs.getfloat("cam_near"),
+                far         = configs.getfloat("cam_far")
+            )
+            vp_matrix = camera.projection_matrix * camera.view_matrix
+            for max_distance in [0, args.max_distance]:
+                culler  = VisibilityCuller({"objects": max_distance})
+                culler.update(vp_matrix, camera.cam_pos)
+                drawn   = int(np.count_nonzero(culler.cull("objects", centers, radii)))
+                seconds = measure(lambda: culler.cull("objects", centers, radii), repeat = 20)["min"]
+                rows.append([size, height, max_distance if max_distance > 0 else "off", drawn, "{:.1f}%".format(100 * drawn / size), "{:.3f}".format(seconds * 1000)])
+
+    print_table(["objects", "height", "max distance", "drawn", "share", "ms"], rows)
@@ -0,0 +1,29 @@
+"""
+Generation times of procedural primitives at growing tessellation, first
+request (cold) against repeated requests served by the memoized factories.
+
+    python -m benchmarks.primitives
+"""
+from benchmarks.common import measure, print_table
+from engine.primitives import Cylinder, Sphere, cylinder_mesh, sphere_mesh
+
+
+
+if __name__ == "__main__":
+
+    cases = [
+        ("Cylinder",    (20,),      Cylinder,   cylinder_mesh),
+        ("Cylinder",    (256,),     Cylinder,   cylinder_mesh),
+        ("Cylinder",    (4096,),    Cylinder,   cylinder_mesh),
+        ("Sphere",      (4, 8),     Sphere,     sphere_mesh),
+        ("Sphere",      (32, 64),   Sphere,     sphere_mesh),
+        ("Sphere",      (256, 512), Sphere,     sphere_mesh),
+    ]
+
+    rows = []
+    for name, args, primitive, factory in cases:
+        cold    = measure(lambda: (factory.cache_clear(), primitive(*args)), repeat = 5)["min"]
+        warm    = measure(lambda: primitive(*args), repeat = 5, number = 100)["min"]
+        rows.append([name, "x".join(map(str, args)), len(primitive(*args).vertex_indices), "{:.3f}".format(cold * 1000), "{:.4f}".format(warm * 1000)])
+
+    print_table(["primitive", "divisions", "indices", "cold ms", "memoized ms"], rows)
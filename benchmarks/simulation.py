@@ -0,0 +1,145 @@
+"""
+Simulation cost without rendering. A headless GameLogic on a synthetic
+airport list is flown by a scripted input stream: full throttle, weaving
+turns and rockets at a fixed rate. Every tick also runs the per-frame logic
+(interpolation, tile culling, object culling) once. Reports ticks per
+second and the cost of every subsystem per tick for growing scenes.
+
+    python -m benchmarks.simulation [--ticks 600] [--warmup 10] [--scenarios 20,100,10,300,2 200,1000,100,3000,10]
+
+A scenario is enemies,white clouds,black clouds,airports,rockets per second.
+"""
+import os
+import csv
+import time
+import argparse
+import tempfile
+import configparser
+import numpy as np
+from typing import Dict, List
+
+from benchmarks.common import print_table
+from engine.game_logic import GameLogic
+
+
+SUBSYSTEMS = [
+    ("airplane",    "_update_air_plane"),
+    ("enemies",     "_update_enemies"),
+    ("rockets",     "_update_rockets"),
+    ("transforms",  "_update_transforms"),
+    ("mission",     "_update_mission"),
+    ("interpolate", "interpolate"),
+    ("tile cull",   "map_tile_check"),
+    ("object cull", "cull_objects"),
+]
+
+
+def write_airports_csv(path: str, no_airports: int, start_airport: str, seed: int = 0):
+    """Large airports spread uniformly over the map, the first one is the start airport."""
+    rng = np.random.default_rng(seed)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "ident", "type", "name", "latitude_deg", "longitude_deg", "elevation_ft", "continent", "iso_country"])
+        writer.writerow([0, "START", "large_airport", start_airport, 50.03, 8.56, 0, "EU", "DE"])
+        for i, (lat, lon) in enumerate(zip(rng.uniform(-80, 80, no_airports - 1), rng.uniform(-180, 180, no_airports - 1))):
+            writer.writerow([i + 1, "X{}".format(i), "large_airport", "Airport {}".format(i), lat, lon, 0, "EU", "C{}".format(i % 100)])
+
+
+class ScriptedInput:
+    """Deterministic input: take off at full throttle, weave left and right, fire at a fixed rate."""
+
+    def __init__(self, configs: configparser.SectionProxy, fire_rate: float):
+        self._gas           = configs.getfloat("plane_gas_acc")
+        self._yaw           = configs.getfloat("plane_yaw_offset")
+        self._fire_rate     = fire_rate
+        self._fired         = 0
+
+
+    def step(self, logic: GameLogic, time: float):
+        if not logic.in_air:
+            logic.in_air = True
+            logic.air_plane.accelerate(self._gas)
+
+        # Turn for two seconds each way
+        logic.air_plane.add_yaw(self._yaw if int(time / 2) % 2 == 0 else -self._yaw)
+
+        while self._fired < time * self._fire_rate:
+            logic.add_rocket()
+            self._fired += 1
+
+
+def cull_objects(logic: GameLogic):
+    """The object culling of GLWidget.paintGL."""
+    logic.visibility_check()
+    logic.culler.cull_models("enemies", logic.enemies)
+    logic.culler.cull_models("clouds", logic.clouds.models)
+    logic.culler.cull("targets", *logic.targets.bounding_spheres)
+    logic.culler.cull_models("rockets", logic.rockets)
+
+
+def instrument(logic: GameLogic) -> Dict[str, float]:
+    """Wrap the subsystem methods of one GameLogic, returns the seconds spent in each."""
+    totals = {name: 0.0 for name, _ in SUBSYSTEMS}
+    for name, attribute in SUBSYSTEMS:
+        method = getattr(logic, attribute) if attribute != "cull_objects" else (lambda: cull_objects(logic))
+        def timed(*args, _method = method, _name = name):
+            start           = time.perf_counter()
+            result          = _method(*args)
+            totals[_name]   += time.perf_counter() - start
+            return result
+        setattr(logic, attribute, timed)
+    return totals
+
+
+def run(configs: configparser.SectionProxy, ticks: int, warmup: int, fire_rate: float) -> List:
+    logic   = GameLogic(configs, headless = True)
+    totals  = instrument(logic)
+    script  = ScriptedInput(configs, fire_rate)
+    step    = 1 / configs.getint("sim_rate")
+
+    # Warm-up ticks compile the numba kernels and are not counted
+    for tick in range(warmup + ticks):
+        if tick == warmup:
+            totals.update({name: 0.0 for name in totals})
+            start = time.perf_counter()
+        script.step(logic, tick * step)
+        logic.update(step)
+        logic.interpolate(1.0)
+        logic.map_tile_check()
+        logic.cull_objects()
+    seconds = time.perf_counter() - start
+
+    no_rockets = len(logic.rockets)
+    logic.release()
+    return [no_rockets, "{:.0f}".format(ticks / seconds), "{:.3f}".format(seconds / ticks * 1000)] + \
+           ["{:.3f}".format(totals[name] / ticks * 1000) for name, _ in SUBSYSTEMS]
+
+
+
+if __name__ == "__main__":
+
+    config = configparser.ConfigParser()
+    config.read("configs.ini")
+    configs = config["DEFAULT"]
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ticks", type=int, default=600)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--scenarios", nargs="+", default=["20,100,10,300,2", "200,1000,100,3000,10", "1000,3000,300,30000,30"])
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for scenario in args.scenarios:
+            enemies, white, black, airports, fire_rate = scenario.split(",")
+            csv_path = os.path.join(temp_dir, "airports_{}.csv".format(airports))
+            write_airports_csv(csv_path, int(airports), configs.get("start_airport"))
+
+            configs["airport_file"]     = csv_path
+            configs["no_enemies"]       = enemies
+            configs["no_white_clouds"]  = white
+            configs["no_black_clouds"]  = black
+            rows.append([enemies, white, black, airports, fire_rate] + run(configs, args.ticks, args.warmup, float(fire_rate)))
+
+    print_table(["enemies", "white", "black", "airports", "rockets / s", "live rockets", "ticks / s", "ms / tick"] +
+                ["{} ms".format(name) for name, _ in SUBSYSTEMS], rows)
@@ -0,0 +1,195 @@
+"""
+Micro-benchmarks of the engine's hot paths with stored baselines. Every case
+is timed in rounds of enough calls to take a few milliseconds, the fastest
+round counts. Save a baseline before a change and compare after it, cases
+slower than the threshold are reported as regressions and make the run fail.
+
+    python -m benchmarks.suite [--filter frustum] [--list]
+    python -m benchmarks.suite --save [benchmarks/baselines/baseline.json]
+    python -m benchmarks.suite --compare [benchmarks/baselines/baseline.json] [--threshold 0.15]
+
+Cases without their input (e.g. the jet model) are skipped. Baselines are
+machine specific and not checked in.
+"""
+import io
+import os
+import sys
+import cv2
+import glm
+import json
+import time
+import argparse
+import platform
+import tempfile
+import contextlib
+import configparser
+import numpy as np
+from typing import Callable, Dict, List, Tuple
+
+import utils
+from benchmarks.common import calibrate, measure, print_table
+from benchmarks.simulation import write_airports_csv
+from engine.camera import PivotCamera
+from engine.frustum import Frustum
+from engine.model import Model
+from engine.primitives import Plane, Cylinder, Sphere, Cloud, OBJ
+from engine.texture import load_image
+from engine.transform_store import TransformStore
+from engine.vao import VAO
+from geography import AirportManager
+from parser import OBJ_Parser
+
+
+DEFAULT_BASELINE = os.path.join("benchmarks", "baselines", "baseline.json")
+
+# Camera poses of the culling cases: distance to the pivot, tilt in degrees
+CAMERA_POSES = [(0.001, 65), (0.01, 65), (0.01, 30), (0.3, 0)]
+
+
+def build_cases(configs: configparser.SectionProxy, temp_dir: str, no_airports: int) -> List[Tuple[str, Callable[[], object]]]:
+    """All cases as (name, callable), inputs are prepared once up front."""
+    cases = []
+
+    # Tile culling without reusing the last result
+    frustum = Frustum(configs.getint("tile_max_z"), configs.getfloat("cam_fov"), configs.getint("window_height"),
+                      configs.getfloat("lod_texel_ratio"), configs.getfloat("horizon_distance"), tolerance = -1)
+    for distance, tilt in CAMERA_POSES:
+        camera = PivotCamera(
+            pivot_point = glm.vec3(0.137, 0.562, 0),
+            tilt_deg    = tilt,
+            distance    = distance,
+            fov_deg     = configs.getfloat("cam_fov"),
+            aspect      = configs.getint("window_width") / configs.getint("window_height"),
+            near        = configs.getfloat("cam_near"),
+            far         = configs.getfloat("cam_far")
+        )
+        vp_matrix = camera.projection_matrix * camera.view_matrix
+        cases.append(("Frustum.cull distance={} tilt={}".format(distance, tilt), lambda vp = vp_matrix, pos = camera.cam_pos: frustum.cull(vp, pos)))
+
+    # Cloud generation and VAOs of every primitive
+    cloud_args = (configs.getint("cloud_min_spheres"), configs.getint("cloud_max_spheres"), configs.getfloat("cloud_min_rad"),
+                  configs.getfloat("cloud_max_rad"), configs.getfloat("cloud_max_off_xy"), configs.getfloat("cloud_max_off_z"))
+    def seeded_cloud():
+        np.random.seed(0)
+        return Cloud(*cloud_args)
+    cases.append(("Cloud", seeded_cloud))
+    primitives = [("Plane", Plane()), ("Cylinder", Cylinder()), ("Sphere", Sphere()), ("Cloud", seeded_cloud())]
+
+    obj_path = configs.get("plane_obj_path")
+    if os.path.exists(obj_path):
+        cases.append(("OBJ_Parser jet", lambda: OBJ_Parser(obj_path)))
+        cache_dir = os.path.join(temp_dir, "meshes")
+        OBJ_Parser(obj_path, cache_dir = cache_dir)
+        cases.append(("OBJ_Parser jet cached", lambda: OBJ_Parser(obj_path, cache_dir = cache_dir)))
+        primitives.append(("OBJ jet", OBJ(obj_path)))
+    else:
+        print("Skipping the jet model cases, '{}' not found".format(obj_path))
+
+    for name, geometry in primitives:
+        cases.append(("VAO.__init__ {}".format(name), lambda geometry = geometry: VAO(geometry)))
+
+    # Decode of one map tile
+    tile_path = os.path.join(temp_dir, "tile.png")
+    cv2.imwrite(tile_path, np.random.default_rng(0).integers(0, 256, (256, 256, 3), dtype=np.uint8))
+    cases.append(("Texture decode 256x256", lambda: load_image(tile_path)))
+
+    # Airports
+    csv_path = os.path.join(temp_dir, "airports.csv")
+    write_airports_csv(csv_path, no_airports, configs.get("start_airport"))
+    def load_airports():
+        # AirportManager reports the number of airports on every load
+        with contextlib.redirect_stdout(io.StringIO()):
+            AirportManager(csv_path)
+    cases.append(("AirportManager {} airports".format(no_airports), load_airports))
+    lat_lon = np.random.default_rng(0).uniform([-80, -180], [80, 180], (no_airports, 2)).tolist()
+    cases.append(("convert_lat_lon {} airports".format(no_airports), lambda: [utils.convert_lat_lon(lat, lon) for lat, lon in lat_lon]))
+
+    # Model matrices: one model through its properties and full batches
+    model_store = TransformStore()
+    model       = Model(VAO(Plane()), glm.vec3(0), 0.005, "assets/test.png", store = model_store)
+    def move_model():
+        model.position = glm.vec3(0.1, 0.2, 0.01)
+        return model.model_matrix
+    cases.append(("Model position and model_matrix", move_model))
+
+    for no_rows in [1, 100, 1000]:
+        store   = TransformStore(no_rows)
+        rows    = np.array([store.allocate() for _ in range(no_rows)])
+        def update_all(store = store, rows = rows):
+            store.mark_dirty(rows)
+            store.update()
+        cases.append(("TransformStore.update {} models".format(no_rows), update_all))
+
+    return cases
+
+
+def run_cases(cases: List[Tuple[str, Callable[[], object]]], repeat: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name, fn in cases:
+        number          = calibrate(fn)
+        results[name]   = measure(fn, repeat = repeat, number = number)
+        print("{:<45} {:>10.4f} ms".format(name, results[name]["min"] * 1000), file = sys.stderr)
+    return results
+
+
+def compare(baseline: Dict[str, Dict[str, float]], results: Dict[str, Dict[str, float]], threshold: float) -> int:
+    """Print the comparison table, returns the number of regressions."""
+    rows        = []
+    regressions = 0
+    for name, result in results.items():
+        if name not in baseline:
+            rows.append([name, "-", "{:.4f}".format(result["min"] * 1000), "-", "new"])
+            continue
+        ratio   = result["min"] / baseline[name]["min"]
+        status  = "ok"
+        if ratio > 1 + threshold:
+            status      = "REGRESSION"
+            regressions += 1
+        elif ratio < 1 - threshold:
+            status      = "improved"
+        rows.append([name, "{:.4f}".format(baseline[name]["min"] * 1000), "{:.4f}".format(result["min"] * 1000), "{:.2f}x".format(ratio), status])
+    print_table(["case", "baseline ms", "current ms", "ratio", "status"], rows)
+    return regressions
+
+
+
+if __name__ == "__main__":
+
+    config = configparser.ConfigParser()
+    config.read("configs.ini")
+    configs = config["DEFAULT"]
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filter", default="", help="only cases whose name contains this text")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, help="store the results as baseline")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, help="compare against a stored baseline")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative slowdown counted as regression")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--airports", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cases = [(name, fn) for name, fn in build_cases(configs, temp_dir, args.airports) if args.filter.lower() in name.lower()]
+        if args.list:
+            print("\n".join(name for name, _ in cases))
+            sys.exit(0)
+        results = run_cases(cases, args.repeat)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump({
+                "meta":     {"machine": platform.node(), "python": platform.python_version(), "numpy": np.__version__,
+                             "time": time.strftime("%Y-%m-%d %H:%M:%S")},
+                "results":  results
+            }, f, indent=2)
+        print("Saved baseline '{}'".format(args.save))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print("Baseline '{}' from {} on {}".format(args.compare, baseline["meta"]["time"], baseline["meta"]["machine"]))
+        sys.exit(1 if compare(baseline["results"], results, args.threshold) else 0)
+
+    print_table(["case", "min ms", "median ms"], [[name, "{:.4f}".format(r["min"] * 1000), "{:.4f}".format(r["median"] * 1000)] for name, r in results.items()])
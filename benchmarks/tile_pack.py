@@ -0,0 +1,74 @@
+"""
+Tiles per second of the PNG path (imread, flip, alpha, cvtColor) against
+zero-copy views of a baked tile pack.
+
+    python -m benchmarks.tile_pack [--tile_dir data/tiles_esri --z 6]
+"""
+import os
+import cv2
+import argparse
+import tempfile
+import numpy as np
+
+from benchmarks.common import measure, print_table
+from engine.tile_loader import load_tile, TILE_SIZE
+from engine.tile_pack import TilePack, bake_pack, pack_path
+
+
+def synthetic_pyramid(tile_dir: str, z: int, no_tiles: int):
+    """Write smooth random tiles, so PNG compression behaves roughly like aerial imagery."""
+    rng     = np.random.default_rng(0)
+    side    = int(np.ceil(np.sqrt(no_tiles)))
+    for i in range(no_tiles):
+        x, y    = divmod(i, side)
+        noise   = rng.integers(0, 255, (TILE_SIZE // 8, TILE_SIZE // 8, 3), dtype=np.uint8)
+        image   = cv2.resize(noise, (TILE_SIZE, TILE_SIZE), interpolation = cv2.INTER_CUBIC)
+        path    = os.path.join(tile_dir, str(z), str(x), f"{y}.png")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        cv2.imwrite(path, image)
+
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tile_dir", default=None, help="Existing tile pyramid, a synthetic one is generated otherwise")
+    parser.add_argument("--z", type=int, default=6)
+    parser.add_argument("--no_tiles", type=int, default=256, help="Number of synthetic tiles")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tile_dir = args.tile_dir
+        if tile_dir is None:
+            tile_dir = os.path.join(tmp_dir, "tiles")
+            synthetic_pyramid(tile_dir, args.z, args.no_tiles)
+
+        pack_dir = os.path.join(tmp_dir, "packs")
+        no_tiles = bake_pack(tile_dir, pack_dir, args.z)
+        pack     = TilePack(pack_path(pack_dir, args.z))
+        keys     = pack.keys()
+
+        # The driver reads every byte on upload, emulate that with a copy into a staging buffer
+        staging  = np.empty((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8)
+
+        def png():
+            for x, y in keys:
+                load_tile(tile_dir, x, y, args.z)
+
+        def pack_view():
+            for x, y in keys:
+                pack.get(x, y)
+
+        def pack_read():
+            for x, y in keys:
+                np.copyto(staging, pack.get(x, y))
+
+        rows = []
+        for name, fn in [("png", png), ("pack (view)", pack_view), ("pack (view + read)", pack_read)]:
+            seconds = measure(fn, repeat = args.repeat)["min"]
+            rows.append([name, no_tiles, "{:.1f}".format(seconds * 1000), "{:.0f}".format(no_tiles / seconds)])
+
+        print_table(["path", "tiles", "ms", "tiles/s"], rows)
+        del staging
+        pack.close()
@@ -0,0 +1,85 @@
+"""
+Model transforms. The former per-model update, which moved every airplane
+with glm vectors and rebuilt its matrix from four glm matrices, against
+models backed by the TransformStore, which moves all models with a speed
+and rebuilds all changed matrices in one batch per tick. The batch has a
+small fixed cost per tick, the default scene (about 20 airplanes) is the
+size to watch.
+
+    python -m benchmarks.transforms [--sizes 20 200 2000]
+"""
+import glm
+import argparse
+import numpy as np
+
+from benchmarks.common import measure, print_table
+from engine.model import Airplane, FORWARD, UP
+from engine.transform_store import TransformStore
+
+
+class FormerAirplane:
+    """The former Airplane.update and Model._update_model_matrix."""
+
+    def __init__(self, position: glm.vec3, yaw_deg: float):
+        self.position       = position
+        self.scale          = glm.vec3(0.005)
+        self.orientation    = glm.angleAxis(glm.radians(yaw_deg), UP)
+        self.velocity       = 0.01
+        self.update_model_matrix()
+
+    def update_model_matrix(self):
+        identity            = glm.mat4(1.0)
+        model_trans         = glm.translate(identity, self.position)
+        model_scale         = glm.scale(identity, self.scale)
+        self.model_matrix   = model_trans * glm.mat4_cast(self.orientation) * model_scale * identity
+
+    def update(self, delta: float):
+        self.velocity       = glm.clamp(self.velocity, 0.0005, 0.1)
+        self.position       += glm.normalize(glm.vec3(self.model_matrix[1])) * self.velocity * delta
+        if self.position.z < 0:
+            self.position.z = 0
+        self.update_model_matrix()
+
+
+class Mesh:
+    """Stands in for a VAO, the benchmark never draws."""
+    bounding_center = np.zeros(3, dtype=np.float32)
+    bounding_radius = 0.5
+
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 200, 2000], help="numbers of moving airplanes")
+    parser.add_argument("--ticks", type=int, default=20)
+    args = parser.parse_args()
+
+    rng     = np.random.default_rng(0)
+    rows    = []
+    for size in args.sizes:
+        positions   = rng.random((size, 3)) * 2 - 1
+        yaws        = rng.random(size) * 360
+
+        former      = [FormerAirplane(glm.vec3(*positions[i]), yaws[i]) for i in range(size)]
+        store       = TransformStore(size)
+        planes      = [Airplane(vao = Mesh(), position = glm.vec3(*positions[i]), scale = 0.005, texture_path = "assets/test.png",
+                                yaw_deg = yaws[i], min_vel = 0.0005, max_vel = 0.1, store = store) for i in range(size)]
+
+        def tick_former():
+            for _ in range(args.ticks):
+                for plane in former:
+                    plane.update(0.016)
+
+        def tick_store():
+            for _ in range(args.ticks):
+                for plane in planes:
+                    plane.update(0.016)
+                store.integrate(0.016)
+                store.update()
+
+        seconds_former  = measure(tick_former, repeat = 3)["min"] / args.ticks
+        seconds_store   = measure(tick_store, repeat = 3)["min"] / args.ticks
+        rows.append([size, "{:.3f}".format(seconds_former * 1000), "{:.3f}".format(seconds_store * 1000), "{:.2f}x".format(seconds_former / seconds_store)])
+
+    print_table(["airplanes", "former ms / tick", "store ms / tick", "speedup"], rows)
@@ -0,0 +1,59 @@
+"""
+Build times of the interleaved VAO vertex data, per-vertex Python loop
+against the vectorized gather in VAO.__init__.
+
+    python -m benchmarks.vao_build [--obj assets/jet.obj]
+"""
+import os
+import argparse
+import configparser
+import numpy as np
+
+from benchmarks.common import measure, print_table
+from engine.primitives import Primitive, Cylinder, Cloud, OBJ
+from engine.vao import VAO
+
+
+def interleave_loop(geometry: Primitive) -> np.ndarray:
+    """The former per-vertex implementation of VAO.__init__."""
+    vertices        = np.reshape(geometry.vertices, (-1, 3))
+    vertex_data     = []
+    for f_idx, uv_idx in zip(geometry.vertex_indices.flatten(), geometry.uv_indices.flatten()):
+        vertex_data.append(np.concatenate([vertices[f_idx], geometry.uv_vertices[uv_idx]]))
+    return np.array(vertex_data, dtype=np.float32)
+
+
+
+if __name__ == "__main__":
+
+    config = configparser.ConfigParser()
+    config.read("configs.ini")
+    configs = config["DEFAULT"]
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--obj", default=configs.get("plane_obj_path"))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    np.random.seed(0)
+    geometries = {
+        "Cylinder":         Cylinder(),
+        "Cylinder (256)":   Cylinder(256),
+        "Cloud":            Cloud(configs.getint("cloud_max_spheres") - 1, configs.getint("cloud_max_spheres"), 
+                                  configs.getfloat("cloud_min_rad"), configs.getfloat("cloud_max_rad"),
+                                  configs.getfloat("cloud_max_off_xy"), configs.getfloat("cloud_max_off_z")),
+    }
+    if os.path.exists(args.obj):
+        geometries["OBJ"] = OBJ(args.obj)
+    else:
+        print("Skipping OBJ, '{}' not found".format(args.obj))
+
+    rows = []
+    for name, geometry in geometries.items():
+        vao = VAO(geometry)
+        assert np.array_equal(interleave_loop(geometry), vao._vertex_data[vao._indices]), name
+        loop_time   = measure(lambda: interleave_loop(geometry), repeat = args.repeat)["min"]
+        vao_time    = measure(lambda: VAO(geometry), repeat = args.repeat)["min"]
+        rows.append([name, geometry.vertex_indices.size, "{:.3f}".format(loop_time * 1000), "{:.3f}".format(vao_time * 1000), "{:.0f}x".format(loop_time / vao_time)])
+
+    print_table(["geometry", "vertices", "loop ms", "vectorized ms", "speedup"], rows)
@@ -0,0 +1,60 @@
+"""
+Vertex and byte savings of the indexed VAO against one vertex per triangle
+corner, for every primitive in engine/primitives.py.
+
+    python -m benchmarks.vao_indexing [--obj assets/jet.obj]
+"""
+import os
+import argparse
+import configparser
+import numpy as np
+
+from benchmarks.common import print_table
+from engine.primitives import Plane, Cylinder, Sphere, Cloud, OBJ
+from engine.vao import VAO
+
+
+# position (vec3) and uv (vec2) as float32
+VERTEX_BYTES = 5 * 4
+
+
+
+if __name__ == "__main__":
+
+    config = configparser.ConfigParser()
+    config.read("configs.ini")
+    configs = config["DEFAULT"]
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--obj", default=configs.get("plane_obj_path"))
+    args = parser.parse_args()
+
+    np.random.seed(0)
+    geometries = {
+        "Plane":            Plane(),
+        "Cylinder":         Cylinder(),
+        "Sphere":           Sphere(),
+        "Cloud":            Cloud(configs.getint("cloud_min_spheres"), configs.getint("cloud_max_spheres"), 
+                                  configs.getfloat("cloud_min_rad"), configs.getfloat("cloud_max_rad"),
+                                  configs.getfloat("cloud_max_off_xy"), configs.getfloat("cloud_max_off_z")),
+    }
+    if os.path.exists(args.obj):
+        geometries["OBJ"] = OBJ(args.obj)
+    else:
+        print("Skipping OBJ, '{}' not found".format(args.obj))
+
+    rows = []
+    for name, geometry in geometries.items():
+        vao         = VAO(geometry)
+        flat_bytes  = vao.index_count * VERTEX_BYTES
+        rows.append([
+            name,
+            vao.index_count,
+            vao.vertex_count,
+            "{}".format(vao._indices.dtype),
+            flat_bytes,
+            vao.nbytes,
+            "{:.0f}%".format(100 * (1 - vao.nbytes / flat_bytes))
+        ])
+
+    print_table(["primitive", "corners", "vertices", "indices", "flat bytes", "indexed bytes", "saved"], rows)
@@ -0,0 +1,81 @@
+import glm
+import numpy as np
+from numpy.typing import NDArray
+from typing import Dict, List
+
+from engine.model import Model
+from engine.primitives import Clouds
+from engine.vao import VAO
+
+
+class CloudField:
+    """
+    All clouds of the map. Clouds sharing a texture are generated together
+    and merged into vertex buffers in world coordinates. The map is split
+    into no_chunks x no_chunks cells and every texture group becomes one
+    static model per cell, so cells outside the view can be culled while
+    each visible cell is still a single draw call.
+    """
+
+    def __init__(self,
+                groups:         Dict[str, int],
+                scale:          NDArray[np.float32],
+                max_height:     float,
+                min_spheres:    int,
+                max_spheres:    int,
+                min_radius:     float,
+                max_radius:     float,
+                max_offset_xy:  float,
+                max_offset_z:   float,
+                no_chunks:      int = 1):
+        self._no_clouds     = 0
+        self._models:       List[Model] = []
+
+        for texture_path, no_clouds in groups.items():
+            if no_clouds <= 0:
+                continue
+
+            # Random positions above the map, z between ground and 'max_height'
+            positions       = np.random.random((no_clouds, 3)) * np.array([2, 2, max_height]) - np.array([1, 1, 0])
+            cells           = np.clip(((positions[:, :2] + 1) / 2 * no_chunks).astype(int), 0, no_chunks - 1)
+            cell_ids        = cells[:, 0] * no_chunks + cells[:, 1]
+
+            for cell_id in np.unique(cell_ids):
+                geometry    = Clouds(positions[cell_ids == cell_id], scale, min_spheres, max_spheres, min_radius, max_radius, max_offset_xy, max_offset_z)
+                self._models.append(Model(
+                    vao             = VAO(geometry),
+                    position        = glm.vec3(0),
+                    scale           = 1,
+                    texture_path    = texture_path
+                ))
+            self._no_clouds += no_clouds
+
+
+    # === Read only Properties ===
+
+    @property
+    def no_clouds(self) -> int:
+        return self._no_clouds
+
+
+    @property
+    def models(self) -> List[Model]:
+        return self._models
+
+
+    # === Public Methods ===
+
+    def initializeGL(self, uniform_locations: Dict):
+        for model in self._models:
+            model.initializeGL(uniform_locations)
+
+
+    def render(self, models: List[Model] | None = None):
+        """Draw one call per texture group and cell, or only 'models', expects the default program to be in use."""
+        for model in self._models if models is None else models:
+            model.render()
+
+
+    def release(self, keep_vao: bool = False):
+        for model in self._models:
+            model.release(keep_vao)
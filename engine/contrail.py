@@ -0,0 +1,132 @@
+import glm
+import numpy as np
+from numpy.typing import NDArray
+from typing import Set
+from OpenGL.GL import *
+
+from engine.primitives import Plane
+from engine.shader import Shader, Program
+from engine.texture import Texture, TEXTURE_REGISTRY
+
+
+# position (xyz), uv, birth time
+VERTEX_SIZE     = 6
+
+
+class Contrail:
+    """
+    Condensation trail behind the airplane. Segments are kept in a fixed-size
+    ring buffer inside one dynamic vertex buffer, the oldest segment is
+    overwritten by the newest. Segments fade out by age in seconds in the
+    shader, the whole trail is drawn with one call. One segment is added
+    per simulation step of 'step' seconds.
+    """
+
+    def __init__(self, life_time: float, step: float, texture_path: str):
+        self._life_time     = life_time
+        self._capacity      = max(int(np.ceil(life_time / step)) + 1, 1)
+        self._texture_path  = texture_path
+        self._texture: Texture = TEXTURE_REGISTRY.acquire(texture_path)
+
+        # Every segment is a textured quad of two triangles
+        plane               = Plane()
+        corners             = plane.vertices[plane.vertex_indices]
+        self._corners       = np.hstack([corners, np.ones((len(corners), 1), dtype=np.float32)])
+        self._uvs           = plane.uv_vertices[plane.uv_indices]
+        self._no_corners    = len(corners)
+
+        # Unused segments are born long enough ago to be expired
+        self._vertices      = np.zeros((self._capacity * self._no_corners, VERTEX_SIZE), dtype=np.float32)
+        self._vertices[:, 5] = -self._life_time - 1
+
+        self._time:         float       = 0
+        self._head:         int         = 0
+        self._dirty:        Set[int]    = set()     # at most one entry per segment, also while nothing is drawn
+
+        # GL objects, created by initializeGL
+        self._program:      Program | None  = None
+        self._vao:          int | None      = None
+        self._vbo:          int | None      = None
+
+
+    # === Private Methods ===
+
+    def _upload_dirty(self):
+        """Copy segments written since the last frame, merged into contiguous ranges."""
+        glBindBuffer(GL_ARRAY_BUFFER, self._vbo)
+        segments    = sorted(self._dirty)
+        start       = 0
+        for i in range(1, len(segments) + 1):
+            if i < len(segments) and segments[i] == segments[i - 1] + 1:
+                continue
+            first, last = segments[start] * self._no_corners, (segments[i - 1] + 1) * self._no_corners
+            data        = self._vertices[first:last]
+            glBufferSubData(GL_ARRAY_BUFFER, first * VERTEX_SIZE * data.itemsize, data.nbytes, data)
+            start       = i
+        self._dirty = set()
+
+
+    # === Public Methods ===
+
+    def update(self, delta: float):
+        self._time += delta
+
+
+    def add(self, model_matrix: glm.mat4):
+        """Append a segment covering the plane quad transformed by 'model_matrix'."""
+        first                   = self._head * self._no_corners
+        segment                 = self._vertices[first:first + self._no_corners]
+        segment[:, :3]          = (self._corners @ np.array(model_matrix).T)[:, :3]
+        segment[:, 3:5]         = self._uvs
+        segment[:, 5]           = self._time
+
+        self._dirty.add(self._head)
+        self._head = (self._head + 1) % self._capacity
+
+
+    def initializeGL(self):
+        vertex_shader           = Shader("shaders/contrail_vertex_shader.glsl", GL_VERTEX_SHADER)
+        fragment_shader         = Shader("shaders/contrail_fragment_shader.glsl", GL_FRAGMENT_SHADER)
+        self._program           = Program(vertex_shader, fragment_shader)
+        uniform_names           = ["view", "projection", "time", "life_time"]
+        self._uniform_locations = {name: self._program.get_uniform_location(name) for name in uniform_names}
+
+        if not self._texture.initialized:
+            self._texture.initializeGL()
+
+        self._vao = glGenVertexArrays(1)
+        self._vbo = glGenBuffers(1)
+        glBindVertexArray(self._vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self._vbo)
+        glBufferData(GL_ARRAY_BUFFER, self._vertices.nbytes, self._vertices, GL_DYNAMIC_DRAW)
+
+        stride = VERTEX_SIZE * self._vertices.itemsize
+        for location, size, offset in [(0, 3, 0), (1, 2, 3), (2, 1, 5)]:
+            glVertexAttribPointer(location, size, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(offset * self._vertices.itemsize))
+            glEnableVertexAttribArray(location)
+        glBindVertexArray(0)
+        self._dirty = set()
+
+
+    def render(self, view_matrix: glm.mat4, projection_matrix: glm.mat4):
+        if self._dirty:
+            self._upload_dirty()
+
+        self._program.use()
+        glUniformMatrix4fv(self._uniform_locations["view"], 1, GL_FALSE, view_matrix.to_bytes())
+        glUniformMatrix4fv(self._uniform_locations["projection"], 1, GL_FALSE, projection_matrix.to_bytes())
+        glUniform1f(self._uniform_locations["time"], self._time)
+        glUniform1f(self._uniform_locations["life_time"], self._life_time)
+
+        self._texture.use()
+        glBindVertexArray(self._vao)
+        glDrawArrays(GL_TRIANGLES, 0, len(self._vertices))
+
+
+    def release(self):
+        TEXTURE_REGISTRY.release(self._texture_path)
+        if self._program is not None:
+            glDeleteVertexArrays(1, [self._vao])
+            glDeleteBuffers(1, [self._vbo])
+            self._program.release()
+            self._program = None
@@ -0,0 +1,43 @@
+class FixedStepClock:
+    """
+    Accumulates real time and hands it out in fixed simulation steps. At most
+    'max_steps' steps run per frame, time beyond that is dropped so a slow
+    frame cannot snowball into ever more simulation work. 'alpha' tells how
+    far the rendered frame lies between the last two simulation steps.
+    """
+
+    def __init__(self, step: float, max_steps: int):
+        self._step          = step
+        self._max_steps     = max_steps
+        self._accumulator   = 0.0
+
+        self.steps:         int     = 0
+        self.dropped:       float   = 0.0
+
+
+    # === Read only Properties ===
+
+    @property
+    def step(self) -> float:
+        return self._step
+
+
+    @property
+    def alpha(self) -> float:
+        return self._accumulator / self._step
+
+
+    # === Public Methods ===
+
+    def advance(self, elapsed: float) -> int:
+        """Add 'elapsed' seconds of real time, returns the number of steps to simulate now."""
+        self._accumulator   += elapsed
+        no_steps            = int(self._accumulator // self._step)
+        if no_steps > self._max_steps:
+            self.dropped        += (no_steps - self._max_steps) * self._step
+            self._accumulator   -= (no_steps - self._max_steps) * self._step
+            no_steps            = self._max_steps
+
+        self._accumulator   -= no_steps * self._step
+        self.steps          += no_steps
+        return no_steps
@@ -1,76 +1,94 @@
 import glm
 import numpy as np
 import geometry as geom
+from engine.tile_loader import TILE_SIZE
 
 from numpy.typing import NDArray
-from typing import Set, Tuple, List
+from typing import Dict, Set, Tuple
 
 
 
 class Frustum:
-    def __init__(self, max_z: int, res_multiplier: float):
+    def __init__(self, 
+                max_z:              int, 
+                fov_deg:            float, 
+                viewport_height:    int, 
+                texel_ratio:        float, 
+                horizon_distance:   float, 
+                tolerance:          float = 0.0):
         self._max_z             = max_z
-        self._res_multiplier    = res_multiplier
+        self._fov               = glm.radians(fov_deg)
+        self._viewport_height   = viewport_height
+        self._texel_ratio       = texel_ratio
+        self._horizon_distance  = horizon_distance
+        self._tolerance         = tolerance
 
+        # Result of the last traversal and the camera it was computed for
+        self._last_vp:          NDArray[np.float32] | None  = None
+        self._last_cam_pos:     NDArray[np.float32] | None  = None
+        self._last_tiles:       Set[Tuple[int, int, int]]   = set()
+
+        self.hits:              int     = 0
+        self.misses:            int     = 0
+
+
+    # === Read only Properties ===
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+    # === Read / Write Properties ===
+
+    @property
+    def viewport_height(self) -> int:
+        return self._viewport_height
+
+    @viewport_height.setter
+    def viewport_height(self, viewport_height: int):
+        self._viewport_height   = viewport_height
+        self._last_vp           = None
+
+
+    # === Public Methods ===
 
     def cull(self, vp_matrix: glm.mat4, cam_pos: glm.vec3) -> Set[Tuple[int, int, int]]:
         """
         Find out which (x, y, z) tiles should be drawn. 
-        Only returns tiles that are within the camera frustum. 
-        Tiles close to the camera position are subdivided, i.e. 
-        the zoom level z is increased for these tiles.
+        Only returns tiles that are within the camera frustum, clamped at the
+        horizon distance. Tiles are subdivided, i.e. the zoom level z is
+        increased, while one of their texels would cover more than
+        'texel_ratio' screen pixels.
+        The last result is reused while the camera moves less than the tolerance,
+        a negative tolerance disables the reuse.
         """
+        vp      = np.array(vp_matrix, dtype=np.float32)
+        cam     = np.array(cam_pos, dtype=np.float32)
+        if self._last_vp is not None and \
+                np.abs(vp - self._last_vp).max() <= self._tolerance and \
+                np.abs(cam - self._last_cam_pos).max() <= self._tolerance:
+            self.hits += 1
+            return self._last_tiles
+        self.misses += 1
+
         inv_viewproj = glm.inverse(vp_matrix)
 
-        # Find frustum boundries (bl, tl, tr, br)
+        # Find frustum boundries (bl, tl, tr, br), rays above the horizon end at the horizon distance
         frustum_points = np.array([
-            geom.ray_z_plane_intersection(inv_viewproj, -1, -1),
-            geom.ray_z_plane_intersection(inv_viewproj, -1, 1),
-            geom.ray_z_plane_intersection(inv_viewproj, 1,  1),
-            geom.ray_z_plane_intersection(inv_viewproj, 1, -1),
+            geom.ray_z_plane_footprint(inv_viewproj, -1, -1, self._horizon_distance),
+            geom.ray_z_plane_footprint(inv_viewproj, -1, 1, self._horizon_distance),
+            geom.ray_z_plane_footprint(inv_viewproj, 1,  1, self._horizon_distance),
+            geom.ray_z_plane_footprint(inv_viewproj, 1, -1, self._horizon_distance),
         ])
 
-        planes = self._test_plane(0, 0, 0, frustum_points, cam_pos)
-        #print(len(planes), " in frustum")
-        return set(planes)
-
-
-    def _test_plane(self, x: int, y: int, z: int, frustum_points: NDArray[np.float32], cam_pos: glm.vec3) -> List[Tuple[int, int, int]]:
-
-        results = []
-
-        # Get Tile corners
-        tile_size   = 2.0 / (2 ** z)  # total range from -1 to 1 = 2.0
-        min_x       = -1.0 + y * tile_size
-        max_x       = min_x + tile_size
-        max_y       = 1 - x * tile_size
-        min_y       = max_y - tile_size
-        tile_points = np.array([(min_x, min_y), (max_x, min_y), (max_x, max_y), (min_x, max_y)])
-
-        # Test if Tile is in camera frustum
-        if not geom.test_plane_intersection_2d(tile_points, frustum_points):
-            return []
-
-        # Check 1: Don't subdivide if the camera is above the tile cube
-        if cam_pos.z > tile_size:
-            return [(x, y, z)]
-
-        # Check 2: Max z Level reached
-        if z == self._max_z:
-            return [(x, y, z)]
-
-        # Check 3: Don't subdivide if distance from camera to the tile bottom center is larger than the tile size
-        center          = glm.vec3(min_x + tile_size / 2, min_y + tile_size / 2, 0)
-        length          = glm.length(cam_pos - center)
-        dist_treshold   = self._res_multiplier * tile_size
-        if length > dist_treshold:
-            return [(x, y, z)]
-        
-        # Subdivide otherwise
-        for x_ in ((2 * x, 2 * x + 1)):
-            for y_ in ((2 * y, 2 * y + 1)):
-                sub_planes = self._test_plane(x_, y_, z+1, frustum_points, cam_pos)
-                results.extend(sub_planes)
-        
-        return results
+        # Screen pixels of one world unit at distance 1
+        pixels_per_unit = self._viewport_height / (2 * np.tan(self._fov / 2))
+
+        # All candidate tiles of a quadtree level are tested together in one compiled kernel
+        tiles = geom.cull_quadtree(frustum_points, cam.astype(np.float64), self._max_z, pixels_per_unit, TILE_SIZE * self._texel_ratio)
 
+        self._last_vp       = vp
+        self._last_cam_pos  = cam
+        self._last_tiles    = set(zip(*tiles.T.tolist())) if len(tiles) else set()
+        return self._last_tiles
@@ -3,49 +3,85 @@ import glm
 import utils
 import numpy as np
 from typing import List, Dict, Tuple
-from concurrent.futures import ThreadPoolExecutor
 
 from engine.frustum import Frustum
+from engine.visibility import VisibilityCuller
+from engine.tile_loader import TileLoader, TILE_SIZE
+from engine.tile_cache import TileCache
+from engine.tile_renderer import TileRenderer
+from engine.tile_prefetcher import TilePrefetcher
 from engine.camera import PivotCamera
-from engine.model import MapTile, Airplane, Model, Target, Rocket, Strip
+from engine.model import Airplane, Model, Rocket
+from engine.cloud_field import CloudField
+from engine.contrail import Contrail
+from engine.instanced_model import InstancedModel
 from engine.vao import VAO
-from engine.primitives import Plane, Cylinder, Cloud, OBJ
-from geography import MissionManager, Mission
+from engine.texture import TEXTURE_REGISTRY
+from engine.transform_store import TRANSFORM_STORE
+from engine.tracing import TRACER
+from engine.primitives import Plane, Cylinder, OBJ
+from geography import MissionManager, Mission, Airport
 
 from OpenGL.GL import *
 
 class GameLogic():
 
-    def __init__(self, configs : cfg.SectionProxy):
-        
+    def __init__(self, configs : cfg.SectionProxy, headless: bool = False):
+        """
+        A headless GameLogic never touches GL: textures are not decoded, the
+        tile loader, cache and renderer are left out and a flat stand-in
+        replaces the airplane mesh file.
+        """
         self._configs       = configs
+        self._headless      = headless
         self._in_air        = False
+        self._time          = 0.0
 
         # Setup Camera and Frustum Controller
         self._cam           = self._setup_camera()
         self._frustum       = self._setup_frustum()
+        self._culler        = VisibilityCuller({
+            name: self._configs.getfloat("draw_distance_" + name) for name in ["enemies", "clouds", "targets", "rockets"]
+        })
 
         # Setup Mission Manager
         self._mission_mgr   = MissionManager(configs)
-        self._mission       = self._mission_mgr.new_mission()
+        self._mission       = self._mission_mgr.new_mission(self._mission_mgr.airport_manager.position_by_name(self._configs.get("start_airport")))
+        self._selected      = None
         print("New Mission: Reach '{}, {}'".format(self._mission.target.name, self._mission.target.country))
 
         # Setup shared VAOs
-        self._air_plane_vao = VAO(OBJ(self._configs.get("plane_obj_path")))
+        self._air_plane_vao = VAO(Plane() if headless else OBJ(self._configs.get("plane_obj_path"), self._configs.get("mesh_cache_dir")))
         self._plane_vao     = VAO(Plane())
         self._cylinder_vao  = VAO(Cylinder())
 
+        # Keep textures of short-lived objects resident, spawning them never touches the disk
+        self._pinned_textures = {path: TEXTURE_REGISTRY.acquire(path) for path in [
+            self._configs.get("rocket_tex_path")
+        ]}
+
         # Setup Game Objects
         self._air_plane     = self._setup_air_plane()
         self._enemies       = self._setup_enemies()
         self._targets       = self._setup_targets()
-        self._wh_clouds     = self._setup_white_clouds()
-        self._bl_clouds     = self._setup_black_clouds()
+        self._clouds        = self._setup_clouds()
         
-        self._strips        = []
+        self._contrail      = Contrail(self._configs.getfloat("strip_life_time"), 1 / self._configs.getint("sim_rate"), self._configs.get("strip_tex_path"))
         self._rockets       = []
 
-        self._tile_cache    = dict()
+        self._tile_loader   = None
+        self._tile_renderer = None
+        self._tile_cache    = None
+        if not headless:
+            self._tile_loader   = TileLoader(
+                no_workers          = self._configs.getint("tile_loader_workers"),
+                tile_dir            = self._configs.get("tile_dir"),
+                pack_dir            = self._configs.get("tile_pack_dir")
+            )
+            self._tile_renderer = TileRenderer(self._configs.getint("tile_vram_budget") // (TILE_SIZE**2 * 4))
+            self._tile_cache    = self._setup_tile_cache()
+        self._prefetcher    = self._setup_prefetcher()
+        self._prefetcher.warm(self._mission.target.position)
     
         # Focus Camera on Airplane
         self._cam.pivot_point = self._air_plane.position
@@ -56,8 +92,20 @@ class GameLogic():
         return self._cam
 
     @property
-    def tiles(self) -> List[MapTile]:
-        return list(self._tile_cache.values())
+    def headless(self) -> bool:
+        return self._headless
+
+    @property
+    def tile_renderer(self) -> TileRenderer | None:
+        return self._tile_renderer
+
+    @property
+    def tile_cache(self) -> TileCache | None:
+        return self._tile_cache
+
+    @property
+    def frustum(self) -> Frustum:
+        return self._frustum
 
     @property
     def air_plane(self) -> Airplane:
@@ -68,15 +116,15 @@ class GameLogic():
         return self._enemies
     
     @property
-    def bl_clouds(self) -> List[Cloud]:
-        return self._bl_clouds
+    def clouds(self) -> CloudField:
+        return self._clouds
     
     @property
-    def wh_clouds(self) -> List[Cloud]:
-        return self._wh_clouds
+    def culler(self) -> VisibilityCuller:
+        return self._culler
     
     @property
-    def targets(self) -> List[Target]:
+    def targets(self) -> InstancedModel:
         return self._targets
     
     @property
@@ -84,13 +132,21 @@ class GameLogic():
         return self._rockets
     
     @property
-    def strips(self) -> List[Strip]:
-        return self._strips
+    def contrail(self) -> Contrail:
+        return self._contrail
 
     @property
     def mission(self) -> Mission:
         return self._mission
     
+    @property
+    def selected_airport(self) -> Airport | None:
+        return self._selected
+
+    @property
+    def time(self) -> float:
+        return self._time
+
     @property
     def in_air(self) -> bool:
         return self._in_air
@@ -115,11 +171,38 @@ class GameLogic():
 
     def _setup_frustum(self) -> Frustum: 
         return Frustum(
-            self._configs.getint("tile_max_z"),
-            self._configs.getfloat("res_multiplier")
+            max_z               = self._configs.getint("tile_max_z"),
+            fov_deg             = self._configs.getfloat("cam_fov"),
+            viewport_height     = self._configs.getint("window_height"),
+            texel_ratio         = self._configs.getfloat("lod_texel_ratio"),
+            horizon_distance    = self._configs.getfloat("horizon_distance"),
+            tolerance           = self._configs.getfloat("cull_tolerance")
         )
     
 
+    def _setup_prefetcher(self) -> TilePrefetcher:
+        return TilePrefetcher(
+            frustum             = self._setup_frustum(),
+            lookahead           = self._configs.getfloat("prefetch_lookahead"),
+            no_steps            = self._configs.getint("prefetch_steps"),
+            target_radius       = self._configs.getfloat("prefetch_target_radius"),
+            target_min_z        = self._configs.getint("tile_base_z") + 1,
+            target_max_z        = self._configs.getint("prefetch_target_z")
+        )
+
+
+    def _setup_tile_cache(self) -> TileCache:
+        return TileCache(
+            renderer            = self._tile_renderer,
+            loader              = self._tile_loader,
+            ram_budget          = self._configs.getint("tile_ram_budget"),
+            low_water           = self._configs.getfloat("tile_cache_low_water"),
+            max_uploads         = self._configs.getint("tile_upload_max_tiles"),
+            max_upload_bytes    = self._configs.getint("tile_upload_max_bytes"),
+            base_z              = self._configs.getint("tile_base_z")
+        )
+
+
     def _setup_air_plane(self) -> Airplane:
         plane_position          = self._mission_mgr.airport_manager.position_by_name(self._configs.get("start_airport"))
         return Airplane(
@@ -151,66 +234,37 @@ class GameLogic():
         return enemies
     
 
-    def _setup_targets(self) -> List[Target]:
-        targets = []
-        for airport in self._mission_mgr.get_airports():
-            target          = Target(
-                vao                 = self._cylinder_vao, 
-                position            = glm.vec3(*airport.position, self._configs.getfloat("target_height") / 2),
-                scale               = glm.vec3(self._configs.getfloat("target_radius"), self._configs.getfloat("target_radius"), self._configs.getfloat("target_height")),
-                texture_path        = self._configs.get("target_tex_path"),
-                rotation_speed      = self._configs.getfloat("target_rot_speed")
-            )
-            targets.append(target)
-        return targets
-    
-
-    def _setup_white_clouds(self) -> List[Model]:
-        clouds      = []
-        rand_pos_xy = np.random.random((self._configs.getint("no_white_clouds"), 2)) * 2 - 1
-        rand_pos_z  = np.random.random(self._configs.getint("no_white_clouds")) * self._configs.getfloat("cloud_max_height")
-        for i in range(self._configs.getint("no_white_clouds")):
-            clouds_geom = Cloud(
-                self._configs.getint("cloud_min_spheres"), 
-                self._configs.getint("cloud_max_spheres"), 
-                self._configs.getfloat("cloud_min_rad"), 
-                self._configs.getfloat("cloud_max_rad"), 
-                self._configs.getfloat("cloud_max_off_xy"), 
-                self._configs.getfloat("cloud_max_off_z")
-            )
-            cloud       = Model(
-                vao             = VAO(clouds_geom), 
-                position        = glm.vec3(*rand_pos_xy[i], rand_pos_z[i]),
-                scale           = glm.vec3(utils.parse_list(self._configs["cloud_scale"], float)),
-                texture_path    = self._configs.get("cloud_tex_white"), 
-                yaw_deg         = 0
-            )
-            clouds.append(cloud)
-        return clouds
+    def _setup_targets(self) -> InstancedModel:
+        airports    = self._mission_mgr.get_airports()
+        height      = self._configs.getfloat("target_height")
+        radius      = self._configs.getfloat("target_radius")
+        positions   = np.array([(*airport.position, height / 2) for airport in airports], dtype=np.float32).reshape(-1, 3)
+        scales      = np.tile(np.array([radius, radius, height], dtype=np.float32), (len(airports), 1))
+        return InstancedModel(
+            vao                 = self._cylinder_vao,
+            positions           = positions,
+            scales              = scales,
+            texture_path        = self._configs.get("target_tex_path"),
+            rotation_speed      = self._configs.getfloat("target_rot_speed")
+        )
     
 
-    def _setup_black_clouds(self) -> List[Model]:
-        clouds      = []
-        rand_pos_xy = np.random.random((self._configs.getint("no_black_clouds"), 2)) * 2 - 1
-        rand_pos_z  = np.random.random(self._configs.getint("no_black_clouds")) * self._configs.getfloat("cloud_max_height")
-        for i in range(self._configs.getint("no_black_clouds")):
-            clouds_geom = Cloud(
-                self._configs.getint("cloud_min_spheres"), 
-                self._configs.getint("cloud_max_spheres"), 
-                self._configs.getfloat("cloud_min_rad"), 
-                self._configs.getfloat("cloud_max_rad"), 
-                self._configs.getfloat("cloud_max_off_xy"), 
-                self._configs.getfloat("cloud_max_off_z")
-            )
-            cloud       = Model(
-                vao             = VAO(clouds_geom), 
-                position        = glm.vec3(*rand_pos_xy[i], rand_pos_z[i]),
-                scale           = glm.vec3(utils.parse_list(self._configs["cloud_scale"], float)),
-                texture_path    = self._configs.get("cloud_tex_black"), 
-                yaw_deg         = 0
-            )
-            clouds.append(cloud)
-        return clouds
+    def _setup_clouds(self) -> CloudField:
+        return CloudField(
+            groups              = {
+                self._configs.get("cloud_tex_black"):   self._configs.getint("no_black_clouds"),
+                self._configs.get("cloud_tex_white"):   self._configs.getint("no_white_clouds")
+            },
+            scale               = np.array(utils.parse_list(self._configs["cloud_scale"], float), dtype=np.float32),
+            max_height          = self._configs.getfloat("cloud_max_height"),
+            min_spheres         = self._configs.getint("cloud_min_spheres"),
+            max_spheres         = self._configs.getint("cloud_max_spheres"),
+            min_radius          = self._configs.getfloat("cloud_min_rad"),
+            max_radius          = self._configs.getfloat("cloud_max_rad"),
+            max_offset_xy       = self._configs.getfloat("cloud_max_off_xy"),
+            max_offset_z        = self._configs.getfloat("cloud_max_off_z"),
+            no_chunks           = self._configs.getint("cloud_chunks")
+        )
     
 
     def _setup_rocket(self) -> Rocket:
@@ -219,30 +273,54 @@ class GameLogic():
             position            = glm.vec3(*self.air_plane.position),
             scale               = self._configs.getfloat("plane_scale"),
             texture_path        = self._configs.get("rocket_tex_path"), 
-            forward             = self.air_plane.forward, 
             rocket_speed        = self._configs.getfloat("rocket_velocity") + self._air_plane.velocity,
-            life_time           = self._configs.getint("rocket_life_time")
+            life_time           = self._configs.getfloat("rocket_life_time")
         )
         rocket.orientation = self.air_plane.orientation
         return rocket
 
 
-    def _setup_strip(self) -> Strip:
-        strip = Strip(
-            vao                 = self._plane_vao, 
-            position            = glm.vec3(*self.air_plane.position),
-            scale               = self._configs.getfloat("plane_scale"),
-            texture_path        = self._configs.get("strip_tex_path"), 
-            life_time           = self._configs.getint("strip_life_time")
-        )
-        strip.orientation = self.air_plane.orientation
-        return strip
+    def _update_air_plane(self, delta: float):
+        # Airplane (once started)
+        self._contrail.update(delta)
+        if self._in_air:
+            self._air_plane.update(delta)
+
+
+    def _update_enemies(self, delta: float):
+        for obj in self._enemies:
+            obj.update(delta)
+
+
+    def _update_rockets(self, delta: float):
+        # Expirable Game Objects
+        for rocket in list(self.rockets):
+            rocket.update(delta)
+            if rocket.is_expired():
+                rocket.release(keep_vao = True)
+                self.rockets.remove(rocket)
+
+
+    def _update_transforms(self, delta: float):
+        # Move everything with a speed and rebuild the model matrices of all changed models, in one batch each
+        TRANSFORM_STORE.integrate(delta)
+        TRANSFORM_STORE.update()
+        if self._in_air:
+            self._contrail.add(self._air_plane.model_matrix)
+
+
+    def _update_mission(self):
+        if self._mission.check_distance((self.air_plane.position.x, self.air_plane.position.y)):
+            self._mission = self._mission_mgr.new_mission((self.air_plane.position.x, self.air_plane.position.y))
+            self._prefetcher.warm(self._mission.target.position)
+            print("New Mission: Reach '{}, {}'".format(self.mission.target.name, self.mission.target.country))
 
 
     def _update_cam(self):
-        self._cam.pivot_point = self.air_plane.position
+        """Follow the airplane as drawn, pivot and orbit both come from its interpolated transform."""
+        self._cam.pivot_point = self._air_plane.render_position
         v1          = glm.vec2(0, 1)
-        plane_forw  = self._air_plane.forward
+        plane_forw  = self._air_plane.render_forward
         v2          = glm.vec2(plane_forw.x, plane_forw.y)
         angle_rad   = utils.signed_angle_2d(v1, v2)
         angle_off   = glm.degrees(angle_rad - self._cam.orbit_rad)        
@@ -250,93 +328,102 @@ class GameLogic():
 
 
     def map_tile_check(self):
+        with TRACER.span("map_tile_check"):
+            tile_ids = self._frustum.cull(self._cam.projection_matrix * self._cam.view_matrix, self._cam.cam_pos)
+            ahead    = self._prefetcher.predict(self._air_plane, self._cam) if self._in_air else set()
+            if self._tile_cache is not None:
+                self._tile_cache.update(tile_ids, [ahead, self._prefetcher.warm_tiles])
 
-        # Add missing tiles
-        tile_ids = self._frustum.cull(self._cam.projection_matrix * self._cam.view_matrix, self._cam.cam_pos)
-        with ThreadPoolExecutor() as executor:
-            futures = []
-            for (x, y, z) in tile_ids:
-                if (x, y, z) not in self._tile_cache:
-                    futures.append(executor.submit(MapTile.prepare_tile, x, y, z, self._plane_vao))
-
-            for future in futures:
-                x, y, z, tile = future.result()
-                self._tile_cache[(x, y, z)] = tile
-                tile.initializeGL(self._uniform_locations)
 
-        # Remove tiles no longer visible
-        for key in list(self._tile_cache.keys()):
-            if not key in tile_ids:
-                self._tile_cache[key].release(keep_vao = True)
-                self._tile_cache.pop(key)
+    def visibility_check(self):
+        self._culler.update(self._cam.projection_matrix * self._cam.view_matrix, self._cam.cam_pos)
 
 
     def initializeGL(self, uniform_locations: Dict):
-        
+        """Upload all GPU resources, a headless GameLogic has none and never touches GL."""
+        if self._headless:
+            return
+
         self._uniform_locations = uniform_locations
 
         # Initialize shared VAOs
         for vao in [self._air_plane_vao, self._plane_vao, self._cylinder_vao]:
             vao.initializeGL()
 
+        self._tile_cache.initializeGL()
+
+        # Upload pinned textures
+        for texture in self._pinned_textures.values():
+            if not texture.initialized:
+                texture.initializeGL()
+
         # Initialize objects
-        for obj in [self._air_plane] + self._enemies + self._targets + self._wh_clouds + self._bl_clouds:
+        for obj in [self._air_plane] + self._enemies:
             obj.initializeGL(uniform_locations)
+        self._clouds.initializeGL(uniform_locations)
+        self._targets.initializeGL()
+        self._contrail.initializeGL()
 
 
     def update(self, delta):
-        
-        # Airplane (once started)
-        if self._in_air:
-            self._air_plane.update(delta)
-            self.add_strip()
-
-        # Regular Game Objects
-        for obj in self._enemies + self._targets:
-            obj.update(delta)
+        """Advance the simulation by one step of 'delta' seconds."""
+        with TRACER.span("update"):
+            self._time += delta
 
-        # Expirable Game Objects
-        for rocket in self.rockets:
-            rocket.update(delta)
-            if rocket.is_expired():
-                rocket.release(keep_vao = True)
-                self.rockets.remove(rocket)
+            self._update_air_plane(delta)
+            self._update_enemies(delta)
+            self._update_rockets(delta)
+            self._update_transforms(delta)
+            self._update_mission()
+            TRANSFORM_STORE.snapshot()
 
-        for strip in self.strips:
-            strip.update(delta)
-            if strip.is_expired():
-                strip.release(keep_vao = True)
-                self.strips.remove(strip)
 
+    def interpolate(self, alpha: float):
+        """Place models and camera 'alpha' of the way from the previous to the current step for drawing."""
+        TRANSFORM_STORE.interpolate(alpha)
         self._update_cam()
 
-        if self._mission.check_distance((self.air_plane.position.x, self.air_plane.position.y)):
-            self._mission = self._mission_mgr.new_mission()
-            print("New Mission: Reach '{}, {}'".format(self.mission.target.name, self.mission.target.country))
+
+    def resize(self, width: int, height: int):
+        self._cam.aspect                        = width / height
+        self._frustum.viewport_height           = height
+        self._prefetcher.frustum.viewport_height = height
+
+
+    def select_airport(self, ray_start: glm.vec3, ray_end: glm.vec3) -> Airport | None:
+        """Select the airport whose target is hit by a ray, the pick radius grows with the camera distance."""
+        radius          = max(self._configs.getfloat("target_radius"), self._configs.getfloat("pick_tolerance") * self._cam.distance)
+        self._selected  = self._mission_mgr.airport_manager.index.pick(ray_start, ray_end, self._configs.getfloat("target_height"), radius)
+        return self._selected
 
 
     def add_rocket(self):
         rocket = self._setup_rocket()
-        rocket.initializeGL(self._uniform_locations)
+        if not self._headless:
+            rocket.initializeGL(self._uniform_locations)
         self._rockets.append(rocket)
 
 
-    def add_strip(self):
-        strip = self._setup_strip()
-        strip.initializeGL(self._uniform_locations)
-        self._strips.append(strip)
-
-    
     def release(self):
         for obj in [self.air_plane] +\
-                list(self._tile_cache.values()) +\
                 self._enemies +\
-                self._bl_clouds +\
-                self._wh_clouds +\
-                self._targets +\
-                self._rockets +\
-                self._strips:
-            obj.release()
+                self._rockets:
+            obj.release(keep_vao = self._headless)
+        self._clouds.release(keep_vao = self._headless)
+
+        # Texture references are released in both modes, GL objects only exist with a context
+        self._targets.release(keep_vao = True)
+        self._contrail.release()
+
+        for path in self._pinned_textures:
+            TEXTURE_REGISTRY.release(path)
+
+        if self._headless:
+            return
+
+        self._tile_cache.release()
+        self._tile_loader.release()
+        self._tile_renderer.release()
 
         for vao in [self._air_plane_vao, self._plane_vao, self._cylinder_vao]:
-            vao.release()
\ No newline at end of file
+            vao.release()
@@ -0,0 +1,143 @@
+import time
+import ctypes
+import contextlib
+import numpy as np
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+from OpenGL.GL import *
+from OpenGL.raw.GL.VERSION.GL_3_3 import glGetQueryObjectui64v as _glGetQueryObjectui64v
+
+
+_NULL_STAGE = contextlib.nullcontext()
+
+
+
+class _Stage:
+
+    __slots__ = ("_profiler", "_name", "_query", "_start")
+
+    def __init__(self, profiler: "GPUProfiler", name: str, query: int):
+        self._profiler  = profiler
+        self._name      = name
+        self._query     = query
+        self._start     = 0
+
+
+    def __enter__(self):
+        glBeginQuery(GL_TIME_ELAPSED, self._query)
+        self._start = time.perf_counter_ns()
+        return self
+
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        glEndQuery(GL_TIME_ELAPSED)
+        self._profiler._pending.append((self._name, self._query, self._start, end - self._start))
+        return False
+
+
+
+class GPUProfiler:
+    """
+    Measures the GPU time of render stages with GL_TIME_ELAPSED queries next
+    to the CPU time spent issuing them. Results are read 'latency' frames
+    later and only if the GPU already finished them, so the profiler never
+    waits for the GPU. Results not ready by then are counted as dropped.
+    Stages must not nest, only one time query can be active at once.
+    """
+
+    def __init__(self, enabled: bool = False, latency: int = 3, window: int = 120):
+        self._enabled       = enabled
+        self._latency       = latency
+
+        # Per frame in flight: (stage, query, cpu start ns, cpu ns)
+        self._frames:       Deque[List[Tuple[str, int, int, int]]]  = deque()
+        self._pending:      List[Tuple[str, int, int, int]]         = []
+        self._free:         List[int]                               = []
+        self._queries:      List[int]                               = []
+        self._result        = ctypes.c_uint64(0)
+
+        self._window        = window
+        self._gpu:          Dict[str, Deque[float]]                 = {}
+        self._cpu:          Dict[str, Deque[float]]                 = {}
+
+        self.dropped:       int     = 0
+        self.invalid:       int     = 0
+
+
+    # === Read only Properties ===
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Median GPU and CPU ms per stage over the last 'window' frames with results."""
+        return {name: {"gpu": float(np.median(self._gpu[name])), "cpu": float(np.median(self._cpu[name])), "count": len(self._gpu[name])}
+                for name in self._gpu if self._gpu[name]}
+
+
+    # === Private Methods ===
+
+    def _query(self) -> int:
+        if not self._free:
+            query = int(glGenQueries(1)[0])
+            self._queries.append(query)
+            return query
+        return self._free.pop()
+
+
+    def _collect(self, stages: List[Tuple[str, int, int, int]]):
+        now = time.perf_counter_ns()
+        for name, query, start, cpu in stages:
+            self._free.append(query)
+            if not glGetQueryObjectiv(query, GL_QUERY_RESULT_AVAILABLE):
+                self.dropped += 1
+                continue
+
+            # Some drivers (llvmpipe) report a timestamp for the very first query, no stage can take longer than the wall time since it began
+            _glGetQueryObjectui64v(query, GL_QUERY_RESULT, ctypes.byref(self._result))
+            if self._result.value > now - start:
+                self.invalid += 1
+                continue
+
+            self._gpu.setdefault(name, deque(maxlen=self._window)).append(self._result.value / 1e6)
+            self._cpu.setdefault(name, deque(maxlen=self._window)).append(cpu / 1e6)
+
+
+    # === Public Methods ===
+
+    def initializeGL(self):
+        if self._enabled and not glGetQueryiv(GL_TIME_ELAPSED, GL_QUERY_COUNTER_BITS):
+            print("GPU timer queries are not supported, GPU profiler disabled")
+            self._enabled = False
+
+
+    def begin_frame(self):
+        """Close the stages of the last frame and read the results of the frame 'latency' frames back."""
+        if not self._enabled:
+            return
+        if self._pending:
+            self._frames.append(self._pending)
+            self._pending = []
+        while len(self._frames) > self._latency:
+            self._collect(self._frames.popleft())
+
+
+    def stage(self, name: str):
+        """Context manager measuring the GL commands of the enclosed block as stage 'name'."""
+        if not self._enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, self._query())
+
+
+    def release(self):
+        if self._queries:
+            glDeleteQueries(len(self._queries), self._queries)
+        self._queries   = []
+        self._free      = []
+        self._frames.clear()
+        self._pending   = []
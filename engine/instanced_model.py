@@ -0,0 +1,133 @@
+import glm
+import numpy as np
+from numpy.typing import NDArray
+from typing import Tuple
+from OpenGL.GL import *
+
+from engine.shader import Shader, Program
+from engine.texture import Texture, TEXTURE_REGISTRY
+from engine.vao import VAO
+
+
+class InstancedModel:
+    """
+    Many copies of one mesh, drawn with a single instanced draw call. Position
+    and scale of every instance live in one buffer, all instances spin
+    around their z axis in the vertex shader, driven by a time uniform.
+    When only a subset is visible, that subset is packed to the buffer front.
+    """
+
+    def __init__(self,
+                vao:            VAO,
+                positions:      NDArray[np.float32],
+                scales:         NDArray[np.float32],
+                texture_path:   str,
+                rotation_speed: float = 0):
+        self._vao               = vao
+        self._texture_path      = texture_path
+        self._rotation_speed    = rotation_speed
+
+        # Interleaved (position, scale) per instance
+        self._instances         = np.hstack([positions, scales]).astype(np.float32)
+        self._texture: Texture  = TEXTURE_REGISTRY.acquire(texture_path)
+
+        # Instances currently in the buffer, all of them until a subset is drawn
+        self._uploaded          = np.ones(len(self._instances), dtype=bool)
+
+        # GL objects, created by initializeGL
+        self._program:      Program | None  = None
+        self._instance_vbo: int | None      = None
+
+
+    # === Read only Properties ===
+
+    @property
+    def positions(self) -> NDArray[np.float32]:
+        return self._instances[:, :3]
+
+
+    @property
+    def scales(self) -> NDArray[np.float32]:
+        return self._instances[:, 3:]
+
+
+    @property
+    def no_instances(self) -> int:
+        return len(self._instances)
+
+
+    @property
+    def bounding_spheres(self) -> Tuple[NDArray[np.float32], NDArray[np.float32]]:
+        """
+        Centers and radii of spheres enclosing the instances. The spin around
+        z is covered by growing the radius by the offset of the mesh center.
+        """
+        scales  = self._instances[:, 3:]
+        reach   = self._vao.bounding_radius + np.linalg.norm(self._vao.bounding_center)
+        return self._instances[:, :3], scales.max(axis=1) * reach
+
+
+    # === Public Methods ===
+
+    def initializeGL(self):
+        vertex_shader           = Shader("shaders/instanced_vertex_shader.glsl", GL_VERTEX_SHADER)
+        fragment_shader         = Shader("shaders/fragment_shader.glsl", GL_FRAGMENT_SHADER)
+        self._program           = Program(vertex_shader, fragment_shader)
+        uniform_names           = ["view", "projection", "time", "rotation_speed", "alpha"]
+        self._uniform_locations = {name: self._program.get_uniform_location(name) for name in uniform_names}
+
+        if not self._texture.initialized:
+            self._texture.initializeGL()
+
+        if not self._vao.initialized:
+            self._vao.initializeGL()
+
+        # Attach the per-instance attributes to the mesh VAO
+        self._instance_vbo = glGenBuffers(1)
+        self._vao.use()
+        glBindBuffer(GL_ARRAY_BUFFER, self._instance_vbo)
+        glBufferData(GL_ARRAY_BUFFER, self._instances.nbytes, self._instances, GL_DYNAMIC_DRAW)
+        stride = self._instances.shape[1] * self._instances.itemsize
+        for i, location in enumerate([2, 3]):
+            glVertexAttribPointer(location, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(i * 3 * self._instances.itemsize))
+            glEnableVertexAttribArray(location)
+            glVertexAttribDivisor(location, 1)
+        glBindVertexArray(0)
+
+
+    def render(self, view_matrix: glm.mat4, projection_matrix: glm.mat4, time: float, visible: NDArray[np.bool_] | None = None):
+        """Draw all instances, or only those flagged in 'visible'. A changed subset is re-uploaded packed."""
+        if visible is None:
+            visible = np.ones(self.no_instances, dtype=bool)
+        if not np.array_equal(visible, self._uploaded):
+            subset = np.ascontiguousarray(self._instances[visible])
+            if len(subset) > 0:
+                glBindBuffer(GL_ARRAY_BUFFER, self._instance_vbo)
+                glBufferSubData(GL_ARRAY_BUFFER, 0, subset.nbytes, subset)
+            self._uploaded = visible.copy()
+        no_instances = int(np.count_nonzero(self._uploaded))
+        if no_instances == 0:
+            return
+
+        self._program.use()
+        glUniformMatrix4fv(self._uniform_locations["view"], 1, GL_FALSE, view_matrix.to_bytes())
+        glUniformMatrix4fv(self._uniform_locations["projection"], 1, GL_FALSE, projection_matrix.to_bytes())
+        # Wrap time to one revolution to keep float precision in long sessions
+        period = 360 / abs(self._rotation_speed) if self._rotation_speed != 0 else 1
+        glUniform1f(self._uniform_locations["time"], time % period)
+        glUniform1f(self._uniform_locations["rotation_speed"], self._rotation_speed)
+        glUniform1f(self._uniform_locations["alpha"], 1.0)
+
+        self._texture.use()
+        self._vao.use()
+        self._vao.render_instanced(no_instances)
+
+
+    def release(self, keep_vao: bool = False):
+        if not keep_vao:
+            self._vao.release()
+        TEXTURE_REGISTRY.release(self._texture_path)
+        if self._program is not None:
+            glDeleteBuffers(1, [self._instance_vbo])
+            self._program.release()
+            self._program = None
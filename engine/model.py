@@ -1,7 +1,9 @@
 from engine.vao import VAO
-from engine.texture import Texture
+from engine.texture import Texture, TEXTURE_REGISTRY
+from engine.transform_store import TransformStore, TRANSFORM_STORE
+import numpy as np
 from pyglm import glm
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 from OpenGL.GL import *
 
 
@@ -11,6 +13,11 @@ FORWARD     = glm.vec3(0, 1, 0)     # roll
 UP          = glm.vec3(0, 0, 1)    # yaw
 
 class Model:
+    """
+    A textured mesh. Position, orientation and scale live in one row of a
+    TransformStore, the model matrix is computed there in batches. Models
+    with a speed are moved by TransformStore.integrate, not by 'update'.
+    """
 
     def __init__(self, 
                 vao:            VAO,
@@ -19,16 +26,21 @@ class Model:
                 texture_path:   str, 
                 yaw_deg:        float               = 0, 
                 pitch_deg:      float               = 0, 
-                roll_deg:       float               = 0):
+                roll_deg:       float               = 0,
+                store:          TransformStore      = TRANSFORM_STORE):
         self._vao           = vao
-        self._position      = position
-        self._scale         = glm.vec3(scale)
         self._texture_path  = texture_path
+        self._store         = store
+        self._row           = store.allocate()
 
-        self._texture:      Texture     = Texture(texture_path)
-        self._model_matrix: glm.mat4    = glm.mat4(1.0)
-        self._orientation:  glm.quat    = glm.quat()
+        self._texture:      Texture     = TEXTURE_REGISTRY.acquire(texture_path)
 
+        # glm copy of the stored matrix, valid while the row's generation is unchanged
+        self._matrix:       glm.mat4    = glm.mat4(1.0)
+        self._generation:   int         = -1
+
+        self.position       = position
+        self.scale          = scale
         self.add_yaw(yaw_deg)
         self.add_pitch(pitch_deg)
         self.add_roll(roll_deg)
@@ -40,71 +52,113 @@ class Model:
 
     @property
     def model_matrix(self) -> glm.mat4:
-        return self._model_matrix
+        """A copy of the model matrix, converted to glm only after the store recomputed it."""
+        if self._store.is_dirty(self._row):
+            self._store.update()
+        generation = self._store.generations.item(self._row)
+        if generation != self._generation:
+            self._matrix        = glm.transpose(glm.mat4(self._store.matrices[self._row]))
+            self._generation    = generation
+        return glm.mat4(self._matrix)
+
+
+    @property
+    def row(self) -> int:
+        """Row of the model in its TransformStore."""
+        return self._row
+
+
+    @property
+    def store(self) -> TransformStore:
+        return self._store
+
+
+    @property
+    def vao(self) -> VAO:
+        return self._vao
+
+
+    @property
+    def render_position(self) -> glm.vec3:
+        """Position drawn in the current frame, between the last two simulation steps."""
+        return glm.vec3(self._render_row()[3, :3])
+
+
+    @property
+    def bounding_sphere(self) -> Tuple[glm.vec3, float]:
+        """World space center and radius of a sphere enclosing the mesh as drawn in the current frame."""
+        centers, radii = self._store.bounding_spheres(np.array([self._row]), np.array([self._vao.bounding_center], dtype=np.float32),
+                                                      np.array([self._vao.bounding_radius], dtype=np.float32))
+        return glm.vec3(centers[0]), float(radii[0])
 
 
     # === Read / Write Properties ===
 
     @property
     def position(self) -> glm.vec3:
-        return self._position
+        """A copy of the stored position, assign to change it."""
+        return glm.vec3(self._store.positions[self._row])
 
     @position.setter
     def position(self, position: glm.vec3):
-        self._position = position
-        self._update_model_matrix()
+        self._store.positions[self._row] = position.to_tuple()
+        self._store.mark_dirty(self._row)
 
 
     @property
     def scale(self) -> glm.vec3:
-        return self._scale
+        return glm.vec3(self._store.scales[self._row])
 
     @scale.setter
     def scale(self, scale: glm.vec3 | float):
-        self._scale = glm.vec3(scale)
-        self._update_model_matrix()
+        self._store.scales[self._row] = glm.vec3(scale)
+        self._store.mark_dirty(self._row)
     
 
     @property
     def orientation(self) -> glm.quat:
-        return self._orientation
+        return glm.quat(self._store.orientations[self._row])
     
     @orientation.setter
     def orientation(self, orientation: glm.quat):
-        self._orientation   = orientation
-        self._update_model_matrix()
+        self._store.orientations[self._row] = (orientation.w, orientation.x, orientation.y, orientation.z)
+        self._store.mark_dirty(self._row)
 
 
     # === Private Methods ===
 
-    def _update_model_matrix(self):
-        identity            = glm.mat4(1.0)
-        model_trans         = glm.translate(identity, self._position)
-        model_scale         = glm.scale(identity, self._scale)
-        self._model_matrix  = model_trans * glm.mat4_cast(self._orientation) * model_scale * identity
+    def _matrix_row(self) -> np.ndarray:
+        """Column-major model matrix, dirty rows of the store are recomputed first."""
+        if self._store.is_dirty(self._row):
+            self._store.update()
+        return self._store.matrices[self._row]
+
+
+    def _render_row(self) -> np.ndarray:
+        """Column-major model matrix to draw, interpolated between simulation steps."""
+        if self._store.is_dirty(self._row):
+            self._store.update()
+        return self._store.render_matrices[self._row]
+
+
+    def _rotate(self, angle_deg: float, axis: glm.vec3):
+        orientation         = self.orientation
+        q_delta             = glm.angleAxis(glm.radians(angle_deg), orientation * axis)
+        self.orientation    = q_delta * orientation
 
 
     # === Public Methods ===
 
     def add_yaw(self, yaw_deg: float):
-        yaw_rad             = glm.radians(yaw_deg)
-        q_delta             = glm.angleAxis(yaw_rad, self._orientation * UP)
-        self._orientation   = q_delta * self._orientation
-        self._update_model_matrix()
+        self._rotate(yaw_deg, UP)
 
 
     def add_pitch(self, pitch_deg: float):
-        pitch_rad           = glm.radians(pitch_deg) 
-        q_delta             = glm.angleAxis(pitch_rad, self._orientation * RIGHT)
-        self._orientation   = q_delta * self._orientation
-        self._update_model_matrix()
+        self._rotate(pitch_deg, RIGHT)
 
 
     def add_roll(self, roll_deg: float):
-        roll_rad            = glm.radians(roll_deg)
-        q_delta             = glm.angleAxis(roll_rad, self._orientation * FORWARD)
-        self._orientation   = q_delta * self._orientation
-        self._update_model_matrix()
+        self._rotate(roll_deg, FORWARD)
 
 
     def update(self, delta: float):
@@ -112,9 +166,11 @@ class Model:
 
 
     def initializeGL(self, uniform_locations: Dict):
-        self._texture.initializeGL()
         self._uniform_locations = uniform_locations
 
+        if not self._texture.initialized:
+            self._texture.initializeGL()
+
         if not self._vao.initialized:
             self._vao.initializeGL()
 
@@ -122,7 +178,7 @@ class Model:
     def render(self):
         
         # Every model has at least a model matrix
-        glUniformMatrix4fv(self._uniform_locations["model"], 1, GL_FALSE, self._model_matrix.to_bytes())
+        glUniformMatrix4fv(self._uniform_locations["model"], 1, GL_FALSE, self._render_row())
 
         self._texture.use()
         self._vao.use()
@@ -132,28 +188,14 @@ class Model:
     def release(self, keep_vao: bool = False):
         if not keep_vao:
             self._vao.release()
-        self._texture.release()
+        TEXTURE_REGISTRY.release(self._texture_path)
+        self._store.release(self._row)
 
     
     def translate(self, offset: glm.vec3 | float):
-        self._position += offset
-
-        if self._position.z < 0:
-            self._position.z = 0
-
-
-
-class Target(Model):
-
-    def __init__(self, rotation_speed: float, *args: Any, **kwargs: Any):
-        super().__init__(*args, **kwargs)
-        self._rotation_speed     = rotation_speed
-
-
-    def update(self, delta: float):
-        self.add_yaw(self._rotation_speed * delta)
-        self._update_model_matrix()
-        super().update(delta)
+        position        = self.position + offset
+        position.z      = max(position.z, 0)
+        self.position   = position
 
 
 
@@ -168,10 +210,19 @@ class Airplane(Model):
         self._velocity:     float   = 0
         self._acceleration: float   = 0
 
+        # Airplanes never go below the ground
+        self._store.ground_clamp[self._row] = True
+
 
     @property
     def forward(self) -> glm.vec3:
-        return glm.normalize(glm.vec3(self._model_matrix[1]))
+        return glm.normalize(self.orientation * FORWARD)
+
+
+    @property
+    def render_forward(self) -> glm.vec3:
+        """Forward axis as drawn in the current frame, between the last two simulation steps."""
+        return glm.normalize(glm.vec3(self._render_row()[1, :3]))
     
 
     @property
@@ -191,76 +242,36 @@ class Airplane(Model):
         # Optional: clamp max velocity
         self._velocity  = glm.clamp(self._velocity, self._min_vel, self._max_vel)
 
-        # Integrate velocity to position
-        self._position += self.forward * self._velocity * delta
-
-        if self._position.z < 0:
-            self._position.z = 0
-
-        self._update_model_matrix()
+        # The store integrates the velocity to positions, for all models at once
+        self._store.speeds[self._row] = self._velocity
         super().update(delta)
 
 
 
 class ExpirableModel(Model):
 
-    def __init__(self, life_time: int, *args: Any, **kwargs: Any):
+    def __init__(self, life_time: float, *args: Any, **kwargs: Any):
         super().__init__(*args, **kwargs)
-        self._life_time     = life_time
+        self._life_time     = life_time     # seconds
         
-        self._no_updates: int = 0
+        self._age:          float   = 0
 
 
     def update(self, delta: float):
-        self._no_updates    += 1
-        self._update_model_matrix()
+        self._age           += delta
         super().update(delta)
 
 
     def is_expired(self) -> bool:
-        return self._no_updates >= self._life_time
+        return self._age >= self._life_time
 
 
 
 class Rocket(ExpirableModel):
 
-    def __init__(self, rocket_speed: float, forward: glm.vec3, *args: Any, **kwargs: Any):
+    def __init__(self, rocket_speed: float, *args: Any, **kwargs: Any):
         super().__init__(*args, **kwargs)
         self._rocket_speed  = rocket_speed
-        self._forward       = forward
-        
-
-    def update(self, delta: float):
-        self._position      += self._forward * self._rocket_speed * delta
-        super().update(delta)
-
-
-
-class Strip(ExpirableModel):
-
-    def __init__(self, *args: Any, **kwargs: Any):
-        super().__init__(*args, **kwargs)
-
-
-
-class MapTile(Model):
-
-    def __init__(self, *args: Any, **kwargs: Any):
-        super().__init__(*args, **kwargs)
-
 
-    def prepare_tile(x: int, y: int, z: int, vao: VAO):
-        center      = 2**z // 2
-        scale       = 2 / 2**z
-        x_pos       = 2 * (-x + center - 0.5) / 2**z
-        y_pos       = 2 * (y - center + 0.5) / 2**z
-        position    = glm.vec3(y_pos, x_pos, 0)
-        texture_path= f"data/tiles_esri/{z}/{x}/{y}.png"
-
-        tile = MapTile(
-            vao          = vao,
-            position     = position,
-            scale        = scale,
-            texture_path = texture_path
-        )
-        return (x, y, z, tile)
\ No newline at end of file
+        # Flies straight along its forward axis, moved by the store
+        self._store.speeds[self._row] = rocket_speed
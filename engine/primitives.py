@@ -1,6 +1,76 @@
 import numpy as np
+from functools import lru_cache
 from parser import OBJ_Parser
 from numpy.typing import NDArray
+from typing import Tuple
+
+
+Mesh = Tuple[NDArray[np.float32], NDArray[np.uint32], NDArray[np.float32], NDArray[np.uint32]]
+
+
+def _freeze(*arrays: np.ndarray) -> Tuple[np.ndarray, ...]:
+    for array in arrays:
+        array.flags.writeable = False
+    return arrays
+
+
+@lru_cache(maxsize=None)
+def cylinder_mesh(segments: int) -> Mesh:
+    """
+    Vertices, vertex indices, uvs and uv indices of a unit cylinder around
+    the z axis. Memoized, the returned arrays are shared and read-only.
+    """
+    i           = np.arange(segments)
+    angle       = i * (2 * np.pi / segments)
+    x, y        = 0.5 * np.cos(angle), 0.5 * np.sin(angle)
+
+    # Top and bottom vertex of every segment alternate
+    vertices    = np.stack([
+        np.stack([x, y, np.full(segments, 0.5)], axis=1),
+        np.stack([x, y, np.full(segments, -0.5)], axis=1)
+    ], axis=1).reshape(-1, 3)
+
+    # The seam has its own uvs at u = 1
+    u           = np.append(i / segments, 1.0)
+    uv_vertices = np.stack([np.repeat(u, 2), np.tile([0.0, 1.0], segments + 1)], axis=1)
+
+    # Two triangles per segment: (top, bottom, top next), (top next, bottom, bottom next)
+    top, top_next   = 2 * i, 2 * ((i + 1) % segments)
+    indices         = np.stack([top, top + 1, top_next, top_next, top + 1, top_next + 1], axis=1)
+    uv_indices      = np.stack([2 * i + 1, 2 * i, 2 * i + 3, 2 * i + 3, 2 * i, 2 * i + 2], axis=1)
+
+    return _freeze(
+        vertices.astype(np.float32),
+        indices.ravel().astype(np.uint32),
+        uv_vertices.astype(np.float32),
+        uv_indices.ravel().astype(np.uint32)
+    )
+
+
+@lru_cache(maxsize=None)
+def sphere_mesh(lat_divs: int, lon_divs: int) -> Mesh:
+    """
+    Vertices, vertex indices, uvs and uv indices of a UV sphere with
+    diameter 1. Memoized, the returned arrays are shared and read-only.
+    """
+    theta       = np.pi * np.arange(lat_divs + 1) / lat_divs
+    phi         = 2 * np.pi * np.arange(lon_divs + 1) / lon_divs
+    theta, phi  = np.meshgrid(theta, phi, indexing="ij")
+
+    x           = np.sin(theta) * np.cos(phi) * 0.5
+    y           = np.cos(theta) * 0.5
+    z           = np.sin(theta) * np.sin(phi) * 0.5
+    vertices    = np.stack([x, z, y], axis=-1).ravel()
+
+    u, v        = np.meshgrid(np.arange(lon_divs + 1) / lon_divs, np.arange(lat_divs + 1) / lat_divs)
+    uv_vertices = np.stack([u, v], axis=-1).reshape(-1, 2)
+
+    # Two triangles per quad between latitude rings
+    first       = (np.arange(lat_divs)[:, None] * (lon_divs + 1) + np.arange(lon_divs)).ravel()
+    second      = first + lon_divs + 1
+    indices     = np.stack([first, second, first + 1, second, second + 1, first + 1], axis=1).ravel().astype(np.uint32)
+
+    return _freeze(vertices.astype(np.float32), indices, uv_vertices.astype(np.float32), indices)
 
 
 class Primitive():
@@ -63,64 +133,7 @@ class Cylinder(Primitive):
         super().__init__()
 
         self._segments      = segments
-        self._generate_geometry()
-
-
-    def _generate_geometry(self):
-        vertices    = []
-        indices     = []
-        uv_vertices = []
-        uv_indices  = []
-
-        angle_step  = 2 * np.pi / self._segments
-        top_z       = 0.5
-        bottom_z    = -0.5
-        u_step      = 1.0 / self._segments
-
-        # Generate vertex positions
-        top_circle_indices      = []
-        bottom_circle_indices   = []
-        for i in range(self._segments):
-            angle   = i * angle_step
-            x       = 0.5 * np.cos(angle)
-            y       = 0.5 * np.sin(angle)
-
-            # Top
-            vertices.append([x, y, top_z])
-            top_circle_indices.append(i * 2)
-
-            # Bottom
-            vertices.append([x, y, bottom_z])
-            bottom_circle_indices.append(i * 2 + 1)
-
-        # Generate uv positions
-        for i in range(self._segments):
-            u_start = i * u_step
-            uv_vertices.append([u_start, 0.0])
-            uv_vertices.append([u_start, 1.0])
-        uv_vertices.append([1.0, 0.0])
-        uv_vertices.append([1.0, 1.0])      
-            
-        # Generate faces
-        for i in range(self._segments):
-            next_i          = (i + 1) % self._segments
-            top_current     = top_circle_indices[i]
-            top_next        = top_circle_indices[next_i]
-            bottom_current  = bottom_circle_indices[i]
-            bottom_next     = bottom_circle_indices[next_i]
-
-            # First triangle
-            indices.extend([top_current, bottom_current, top_next])
-            uv_indices.extend([1 + (i*2), (i*2), 3 + (i*2)])
-            
-            # Second triangle
-            indices.extend([top_next, bottom_current, bottom_next])
-            uv_indices.extend([3 + (i*2), (i*2), 2 + (i*2)])
-
-        self._vertices          = np.array(vertices, dtype=np.float32)
-        self._vertex_indices    = np.array(indices, dtype=np.uint32)
-        self._uv_vertices       = np.array(uv_vertices, dtype=np.float32)
-        self._uv_indices        = np.array(uv_indices, dtype=np.uint32)
+        self._vertices, self._vertex_indices, self._uv_vertices, self._uv_indices = cylinder_mesh(segments)
 
 
 
@@ -131,84 +144,51 @@ class Sphere(Primitive):
 
         self._lat_divs = lat_divs
         self._lon_divs = lon_divs
-        self._generate_geometry()
-
-
-    def _generate_geometry(self):
+        self._vertices, self._vertex_indices, self._uv_vertices, self._uv_indices = sphere_mesh(lat_divs, lon_divs)
 
-        vertices    = []
-        indices     = []
-        uv_vertices = []
 
-        for i in range(self._lat_divs + 1):
-            theta       = np.pi * i / self._lat_divs
-            sin_theta   = np.sin(theta)
-            cos_theta   = np.cos(theta)
 
-            for j in range(self._lon_divs + 1):
-                phi     = 2 * np.pi * j / self._lon_divs
-                sin_phi = np.sin(phi)
-                cos_phi = np.cos(phi)
+class Clouds(Primitive):
+    """
+    Many clouds merged into one geometry. Every cloud is a random heap of
+    spheres around its position, scaled by 'scale', all in world coordinates.
+    """
 
-                x = sin_theta * cos_phi * 0.5
-                y = cos_theta * 0.5
-                z = sin_theta * sin_phi * 0.5
-
-                u = j / self._lon_divs
-                v = i / self._lat_divs
+    def __init__(self, positions: NDArray[np.float32], scale: NDArray[np.float32], min_spheres: int, max_spheres: int, min_radius: float, max_radius: float, max_offset_xy: float, max_offset_z: float):
+        super().__init__()
 
-                vertices.extend([x, z, y])
-                uv_vertices.append([u, v])
+        positions   = np.reshape(positions, (-1, 3))
+        no_spheres  = np.random.randint(min_spheres, max_spheres, len(positions))
+        cloud_ids   = np.repeat(np.arange(len(positions)), no_spheres)
+        radius      = np.random.random(len(cloud_ids)) / (max_radius - min_radius) + min_radius
+        offset      = np.random.random((len(cloud_ids), 3)) * np.array([max_offset_xy, max_offset_xy, max_offset_z])
 
-        for i in range(self._lat_divs):
-            for j in range(self._lon_divs):
-                first = i * (self._lon_divs + 1) + j
-                second = first + self._lon_divs + 1
+        # Place all sphere copies at once: (spheres, sphere vertices, xyz)
+        sphere      = Sphere()
+        sphere_vert = np.reshape(sphere.vertices, (-1, 3))
+        vertices    = (sphere_vert[None] * radius[:, None, None] + offset[:, None]) * scale + positions[cloud_ids][:, None]
+        indices     = sphere.vertex_indices[None] + len(sphere_vert) * np.arange(len(cloud_ids))[:, None]
 
-                indices.extend([first, second, first + 1])
-                indices.extend([second, second + 1, first + 1])
+        self._vertices          = vertices.reshape(-1, 3).astype(np.float32)
+        self._vertex_indices    = indices.ravel().astype(np.uint32)
+        self._uv_vertices       = np.tile(sphere.uv_vertices, (len(cloud_ids), 1)).astype(np.float32)
+        self._uv_indices        = self._vertex_indices
 
-        self._vertices          = np.array(vertices, dtype=np.float32)
-        self._vertex_indices    = np.array(indices, dtype=np.uint32)
-        self._uv_vertices       = np.array(uv_vertices, dtype=np.float32)
-        self._uv_indices        = np.array(indices, dtype=np.uint32)
 
-   
 
-class Cloud(Primitive):
+class Cloud(Clouds):
 
     def __init__(self, min_spheres: int, max_spheres: int, min_radius: float, max_radius: float, max_offset_xy: float, max_offset_z: float):
-        super().__init__()
-
-        no_spheres  = np.random.randint(min_spheres, max_spheres)
-        radius      = np.random.random(no_spheres) / (max_radius - min_radius) + min_radius
-        offset      = np.random.random((no_spheres, 3)) * np.array([max_offset_xy, max_offset_xy, max_offset_z])
-
-        vertices    = []
-        indices     = []
-        uv_vertices = []
-
-        sphere = Sphere()
-
-        for i in range(no_spheres):
-            vert = np.reshape(sphere.vertices, (-1, 3)) * radius[i] + offset[i]
-            vertices.extend(vert)
-            uv_vertices.extend(sphere.uv_vertices)
-            indices.extend(len(vert) * i + sphere.vertex_indices)
-
-        self._vertices          = np.array(vertices, dtype=np.float32)
-        self._vertex_indices    = np.array(indices, dtype=np.uint32)
-        self._uv_vertices       = np.array(uv_vertices, dtype=np.float32)
-        self._uv_indices        = np.array(indices, dtype=np.uint32)
+        super().__init__(np.zeros(3, dtype=np.float32), np.ones(3, dtype=np.float32), min_spheres, max_spheres, min_radius, max_radius, max_offset_xy, max_offset_z)
 
 
 
 class OBJ(Primitive):
 
-    def __init__(self, obj_path):
+    def __init__(self, obj_path: str, cache_dir: str | None = None):
         super().__init__()
         
-        parser  = OBJ_Parser(obj_path)
+        parser  = OBJ_Parser(obj_path, cache_dir = cache_dir)
 
         vertices, vertex_indices    = parser.get_vertex_data()
         uv_vertices, uv_indices     = parser.get_uv_data()
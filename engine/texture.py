@@ -1,36 +1,58 @@
 from OpenGL.GL import *
 import os
 import cv2
+import threading
 import numpy as np
+from numpy.typing import NDArray
+from typing import Dict
 
-class Texture():
 
-    def __init__(self, path: str, backup_path: str = "assets/test.png"):
-        
-        try:
-            if not os.path.exists(path):
-                raise FileNotFoundError
-            image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
-            if image is None:
-                raise ImportError
-        except: 
-            image = cv2.imread(backup_path, cv2.IMREAD_UNCHANGED)
+def convert_image(image: NDArray[np.uint8]) -> NDArray[np.uint8]:
+    """Convert a decoded OpenCV image into a vertically flipped RGBA array, ready for upload."""
+
+    # Flip vertically to match OpenGL's coordinate system
+    image = cv2.flip(image, 0)
+
+    # Add full alpha channel if missing
+    if image.shape[2] == 3:
+        alpha = np.full((image.shape[0], image.shape[1], 1), 255, dtype=np.uint8)
+        image = np.concatenate((image, alpha), axis=2)
+
+    # Convert BGR(A) to RGB(A)
+    return cv2.cvtColor(image, cv2.COLOR_BGRA2RGBA)
+
+
+def load_image(path: str, backup_path: str = "assets/test.png") -> NDArray[np.uint8]:
+    """Decode an image file into a vertically flipped RGBA array, ready for upload."""
+    try:
+        if not os.path.exists(path):
+            raise FileNotFoundError
+        image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if image is None:
+            raise ImportError
+    except: 
+        image = cv2.imread(backup_path, cv2.IMREAD_UNCHANGED)
+    return convert_image(image)
 
-        # Flip vertically to match OpenGL's coordinate system
-        image = cv2.flip(image, 0)
 
-        # Add full alpha channel if missing
-        if image.shape[2] == 3:
-            alpha = np.full((image.shape[0], image.shape[1], 1), 255, dtype=np.uint8)
-            image = np.concatenate((image, alpha), axis=2)
 
-        # Convert BGR(A) to RGB(A)
-        self._data = cv2.cvtColor(image, cv2.COLOR_BGRA2RGBA)
+class Texture():
+    """An image texture, decoded on upload only. Without a GL context nothing is decoded at all."""
+
+    def __init__(self, path: str, backup_path: str = "assets/test.png"):
+        self._path          = path
+        self._backup_path   = backup_path
+        self._initialized   = False
+
 
+    @property
+    def initialized(self) -> bool:
+        return self._initialized
 
 
     def initializeGL(self):
-        self._texture = glGenTextures(1)
+        data            = load_image(self._path, self._backup_path)
+        self._texture   = glGenTextures(1)
         glBindTexture(GL_TEXTURE_2D, self._texture)
 
         # Texture parameters
@@ -39,13 +61,70 @@ class Texture():
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
 
-        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, self._data.shape[1], self._data.shape[0], 0, GL_RGBA, GL_UNSIGNED_BYTE, self._data.tobytes())
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, data.shape[1], data.shape[0], 0, GL_RGBA, GL_UNSIGNED_BYTE, data.tobytes())
         glGenerateMipmap(GL_TEXTURE_2D)
 
+        self._initialized = True
+
 
     def use(self):
         glBindTexture(GL_TEXTURE_2D, self._texture)
 
 
     def release(self):
-        glDeleteTextures([self._texture])
\ No newline at end of file
+        if self._initialized:
+            glDeleteTextures([self._texture])
+            self._initialized = False
+
+
+
+class TextureRegistry():
+    """
+    Shares textures between models. Every image path is decoded and uploaded 
+    only once, users acquire / release it and the texture is freed as soon 
+    as the last user releases it.
+    """
+
+    def __init__(self):
+        self._textures:     Dict[str, Texture]  = {}
+        self._ref_counts:   Dict[str, int]      = {}
+        self._lock          = threading.Lock()
+
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normpath(path)
+
+
+    def acquire(self, path: str) -> Texture:
+        key = self._key(path)
+        with self._lock:
+            if key not in self._textures:
+                # Cheap, the image is only decoded on upload
+                self._textures[key]     = Texture(path)
+                self._ref_counts[key]   = 0
+            self._ref_counts[key] += 1
+            return self._textures[key]
+
+
+    def release(self, path: str):
+        key = self._key(path)
+        with self._lock:
+            if key not in self._textures:
+                return
+            self._ref_counts[key] -= 1
+            if self._ref_counts[key] > 0:
+                return
+            texture = self._textures.pop(key)
+            self._ref_counts.pop(key)
+        texture.release()
+
+
+    def ref_count(self, path: str) -> int:
+        with self._lock:
+            return self._ref_counts.get(self._key(path), 0)
+
+
+
+# Process wide registry shared by all models
+TEXTURE_REGISTRY = TextureRegistry()
@@ -0,0 +1,270 @@
+import numpy as np
+from collections import OrderedDict
+from numpy.typing import NDArray
+from typing import Any, Callable, Dict, Hashable, List, Sequence, Set, Tuple
+
+from engine.tile_loader import TileLoader, TileKey, TILE_SIZE
+from engine.tile_renderer import TileRenderer, tile_instance, INSTANCE_SIZE
+from engine.tracing import TRACER
+
+
+class LRUCache:
+    """
+    Least recently used cache limited by the byte size of its entries.
+    Once the budget is exceeded, entries are evicted down to 'low_water' times
+    the budget, so the cache does not evict on every single insertion.
+    """
+
+    def __init__(self, max_bytes: int, low_water: float = 1.0, on_evict: Callable[[Hashable, Any], None] | None = None):
+        self._max_bytes     = max_bytes
+        self._low_water     = low_water
+        self._on_evict      = on_evict
+
+        self._entries:      OrderedDict[Hashable, Tuple[Any, int]] = OrderedDict()
+        self._no_bytes:     int     = 0
+
+        self.hits:          int     = 0
+        self.misses:        int     = 0
+        self.evictions:     int     = 0
+
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+    # === Read only Properties ===
+
+    @property
+    def no_bytes(self) -> int:
+        return self._no_bytes
+
+
+    # === Read / Write Properties ===
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes: int):
+        self._max_bytes = max_bytes
+
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits":         self.hits,
+            "misses":       self.misses,
+            "evictions":    self.evictions,
+            "entries":      len(self._entries),
+            "bytes":        self._no_bytes
+        }
+
+
+    # === Public Methods ===
+
+    def get(self, key: Hashable) -> Any | None:
+        """Look up an entry and count the hit / miss."""
+        if key not in self._entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return self._entries[key][0]
+
+
+    def peek(self, key: Hashable) -> Any | None:
+        """Look up an entry without touching counters or recency."""
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+
+    def touch(self, key: Hashable):
+        """Mark an entry as most recently used."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+
+
+    def put(self, key: Hashable, value: Any, nbytes: int):
+        if key in self._entries:
+            self._evict(key, count = False)
+        self._entries[key]  = (value, nbytes)
+        self._no_bytes      += nbytes
+
+
+    def trim(self, protected: Set[Hashable] = frozenset()):
+        """Evict least recently used entries if the budget is exceeded. Protected entries are kept."""
+        if self._no_bytes <= self._max_bytes:
+            return
+
+        target = self._max_bytes * self._low_water
+        for key in list(self._entries.keys()):
+            if self._no_bytes <= target:
+                break
+            if key in protected:
+                continue
+            self._evict(key)
+
+
+    def clear(self):
+        for key in list(self._entries.keys()):
+            self._evict(key)
+
+
+    # === Private Methods ===
+
+    def _evict(self, key: Hashable, count: bool = True):
+        value, nbytes   = self._entries.pop(key)
+        self._no_bytes  -= nbytes
+        self.evictions  += int(count)
+        if self._on_evict is not None:
+            self._on_evict(key, value)
+
+
+
+class TileCache:
+    """
+    Two-level cache for map tiles: decoded pixels in RAM and uploaded tiles in
+    the layers of the tile renderer's texture array (VRAM). Visible tiles are
+    always kept, recently visible tiles stay resident until the byte budget of
+    their level forces them out.
+
+    Tiles are refined coarse to fine: the levels up to 'base_z' are always
+    resident and visible tiles that are still loading are covered by the
+    matching part of their nearest resident ancestor.
+    """
+
+    def __init__(self,
+                renderer:           TileRenderer,
+                loader:             TileLoader,
+                ram_budget:         int,
+                low_water:          float,
+                max_uploads:        int,
+                max_upload_bytes:   int,
+                base_z:             int):
+        self._renderer          = renderer
+        self._loader            = loader
+        self._max_uploads       = max_uploads
+        self._max_upload_bytes  = max_upload_bytes
+
+        # VRAM entries map tiles to texture layers, freed layers are reused
+        self._ram               = LRUCache(ram_budget, low_water)
+        self._vram              = LRUCache(renderer.no_layers * TILE_SIZE**2 * 4, low_water, on_evict = lambda key, layer: self._free_layers.append(layer))
+        self._free_layers:      List[int]       = []
+
+        self._base:             Set[TileKey]    = {(x, y, z) for z in range(base_z + 1) for x in range(2**z) for y in range(2**z)}
+        self._visible:          Set[TileKey]    = set()
+
+
+    # === Read only Properties ===
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {"ram": self._ram.stats, "vram": self._vram.stats}
+
+
+    # === Private Methods ===
+
+    def _ancestors(self, keys: Set[TileKey]) -> Set[TileKey]:
+        ancestors = set()
+        for x, y, z in keys:
+            while z > 0:
+                x, y, z = x // 2, y // 2, z - 1
+                if (x, y, z) in ancestors:
+                    break
+                ancestors.add((x, y, z))
+        return ancestors
+
+
+    def _resident_ancestor(self, key: TileKey) -> TileKey | None:
+        x, y, z = key
+        while z > 0:
+            x, y, z = x // 2, y // 2, z - 1
+            if (x, y, z) in self._vram:
+                return (x, y, z)
+        return None
+
+
+    def _instances(self, visible: Set[TileKey]) -> NDArray[np.float32]:
+        """Instance attributes of the visible tiles, missing tiles show their nearest resident ancestor."""
+        instances = []
+        for key in visible:
+            source = key if key in self._vram else self._resident_ancestor(key)
+            if source is None:
+                continue
+            instances.append(tile_instance(*key, self._vram.peek(source), source))
+        return np.array(instances, dtype=np.float32).reshape(-1, INSTANCE_SIZE)
+
+
+    # === Public Methods ===
+
+    def initializeGL(self):
+        self._renderer.initializeGL()
+
+        # Keep enough layers free for the uploads of the next frame
+        no_layers           = self._renderer.no_layers
+        self._free_layers   = list(reversed(range(no_layers)))
+        self._vram.max_bytes = (no_layers - self._max_uploads) * TILE_SIZE**2 * 4
+
+
+    def update(self, visible: Set[TileKey], prefetch: Sequence[Set[TileKey]] = ()):
+        """
+        Make the visible tiles resident. Must be called from the GL thread.
+        Uploads at most 'max_uploads' tiles or 'max_upload_bytes' bytes per call.
+        Tiles of the 'prefetch' sets are only decoded into RAM, after the
+        visible tiles and in the order of the sets.
+        """
+
+        # Move freshly decoded tiles into RAM
+        for key, pixels in self._loader.collect():
+            self._ram.put(key, pixels, pixels.nbytes)
+
+        # Count hits / misses only for tiles that just became visible
+        for key in visible:
+            if key in self._visible:
+                self._vram.touch(key)
+                self._ram.touch(key)
+            elif self._vram.get(key) is None:
+                self._ram.get(key)
+
+        # Besides the visible tiles, keep the base levels and the ancestors of missing tiles
+        missing     = {key for key in visible if key not in self._vram}
+        wanted      = visible | self._base | self._ancestors(missing)
+
+        # Upload decoded tiles into free layers within the per-frame budget, coarse tiles first
+        no_uploads, no_bytes = 0, 0
+        for key in sorted(wanted, key = lambda key: key[2]):
+            if no_uploads >= self._max_uploads or no_bytes >= self._max_upload_bytes or not self._free_layers:
+                break
+            pixels = self._ram.peek(key)
+            if key in self._vram or pixels is None:
+                continue
+
+            layer = self._free_layers.pop()
+            with TRACER.span("tile upload"):
+                self._renderer.upload(layer, pixels)
+            self._vram.put(key, layer, pixels.nbytes)
+            no_uploads  += 1
+            no_bytes    += pixels.nbytes
+
+        # Queue tiles that are neither in VRAM nor RAM, prefetched ones at lower priority
+        prefetched  = set().union(*prefetch) - wanted
+        self._loader.retain(wanted | prefetched)
+        self._loader.request([key for key in wanted if key not in self._vram and key not in self._ram])
+        for priority, tiles in enumerate(prefetch, start = 1):
+            self._loader.request([key for key in tiles if key not in self._vram and key not in self._ram], priority)
+
+        self._vram.trim(wanted)
+        self._ram.trim(wanted | prefetched)
+        self._visible = set(visible)
+
+        self._renderer.update_instances(self._instances(self._visible))
+
+
+    def release(self):
+        self._vram.clear()
+        self._ram.clear()
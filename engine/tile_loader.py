@@ -0,0 +1,136 @@
+import cv2
+import queue
+import itertools
+import threading
+import numpy as np
+from numpy.typing import NDArray
+from typing import Dict, Iterable, List, Set, Tuple
+
+from engine.texture import load_image
+from engine.tile_pack import TilePack, open_packs
+from engine.tracing import TRACER
+
+
+TileKey     = Tuple[int, int, int]
+TILE_SIZE   = 256
+
+
+def tile_path(tile_dir: str, x: int, y: int, z: int) -> str:
+    return f"{tile_dir}/{z}/{x}/{y}.png"
+
+
+def load_tile(tile_dir: str, x: int, y: int, z: int) -> NDArray[np.uint8]:
+    """Decode the PNG of tile (x, y, z) into a TILE_SIZE x TILE_SIZE RGBA array."""
+    pixels = load_image(tile_path(tile_dir, x, y, z))
+
+    # The backup image of missing tiles has a different size
+    if pixels.shape[:2] != (TILE_SIZE, TILE_SIZE):
+        pixels = cv2.resize(pixels, (TILE_SIZE, TILE_SIZE), interpolation = cv2.INTER_AREA)
+    return pixels
+
+
+class TileLoader:
+    """
+    Decodes map tiles in the background. Requested tiles are decoded by a
+    persistent pool of worker threads and wait in a completion queue until
+    they are collected. Requests are served by priority, then coarse to fine.
+
+    Zoom levels baked into a tile pack are read as zero-copy views of the
+    memory-mapped pack, all others are decoded from their PNG files.
+    """
+
+    def __init__(self, no_workers: int, tile_dir: str, pack_dir: str):
+        self._tile_dir                      = tile_dir
+        self._packs:    Dict[int, TilePack] = open_packs(pack_dir)
+
+        self._requests:     queue.Queue     = queue.PriorityQueue()
+        self._sequence      = itertools.count()
+        self._completed:    queue.Queue     = queue.Queue()
+
+        # Tiles that are requested but not collected or discarded yet
+        self._pending:      Set[TileKey]    = set()
+        self._wanted:       Set[TileKey]    = set()
+        self._lock          = threading.Lock()
+
+        self._workers       = [threading.Thread(target=self._work, daemon=True) for _ in range(no_workers)]
+        for worker in self._workers:
+            worker.start()
+
+
+    # === Read only Properties ===
+
+    @property
+    def no_pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+
+    # === Private Methods ===
+
+    def _load(self, x: int, y: int, z: int) -> NDArray[np.uint8]:
+        pack = self._packs.get(z)
+        if pack is not None and pack.tile_size == TILE_SIZE:
+            pixels = pack.get(x, y)
+            if pixels is not None:
+                return pixels
+        with TRACER.span("tile decode"):
+            return load_tile(self._tile_dir, x, y, z)
+
+
+    def _work(self):
+        while True:
+            *_, key = self._requests.get()
+            if key is None:
+                return
+
+            # Skip tiles that left the view while waiting in the queue
+            if key not in self._wanted:
+                with self._lock:
+                    self._pending.discard(key)
+                continue
+
+            self._completed.put((key, self._load(*key)))
+
+
+    # === Public Methods ===
+
+    def retain(self, tile_ids: Set[TileKey]):
+        """Set the tiles that are still of interest, all others are dropped once they come up."""
+        self._wanted = set(tile_ids)
+
+
+    def request(self, tile_ids: Iterable[TileKey], priority: int = 0):
+        """Queue tiles for decoding, lower priorities come first. Tiles already on their way are ignored."""
+        with self._lock:
+            for key in tile_ids:
+                if key in self._pending:
+                    continue
+                self._pending.add(key)
+                self._requests.put((priority, key[2], next(self._sequence), key))
+
+
+    def collect(self) -> List[Tuple[TileKey, NDArray[np.uint8]]]:
+        """Return all tiles decoded since the last call."""
+        decoded = []
+        while True:
+            try:
+                key, pixels = self._completed.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._pending.discard(key)
+            decoded.append((key, pixels))
+        return decoded
+
+
+    def release(self):
+        self._wanted = set()
+        for _ in self._workers:
+            self._requests.put((-1, -1, next(self._sequence), None))
+        for worker in self._workers:
+            worker.join()
+
+        # Drop decoded views into the packs before unmapping them
+        self.collect()
+        for pack in self._packs.values():
+            pack.close()
@@ -0,0 +1,139 @@
+import os
+import cv2
+import mmap
+import numpy as np
+from numpy.typing import NDArray
+from typing import Dict, List, Tuple
+
+from engine.texture import convert_image
+
+
+# Tile pack layout, one file per zoom level, all numbers little endian:
+#   header      HEADER_DTYPE
+#   index       no_tiles x INDEX_DTYPE, sorted by (x, y)
+#   tiles       no_tiles x (tile_size x tile_size x 4) bytes, page aligned
+# Tiles are stored pre-flipped as RGBA, exactly as they are uploaded to OpenGL.
+PACK_MAGIC      = b"PSTP"
+PACK_VERSION    = 1
+PAGE_SIZE       = 4096
+HEADER_DTYPE    = np.dtype([("magic", "S4"), ("version", "<u4"), ("z", "<u4"), ("tile_size", "<u4"), ("no_tiles", "<u4")])
+INDEX_DTYPE     = np.dtype([("x", "<u4"), ("y", "<u4"), ("offset", "<u8")])
+
+
+def pack_path(pack_dir: str, z: int) -> str:
+    return os.path.join(pack_dir, f"{z}.pack")
+
+
+def bake_pack(tile_dir: str, pack_dir: str, z: int, tile_size: int = 256) -> int:
+    """
+    Convert all '{tile_dir}/{z}/{x}/{y}.png' tiles of a zoom level into one pack file.
+    Returns the number of baked tiles.
+    """
+    tiles: List[Tuple[int, int, str]] = []
+    level_dir = os.path.join(tile_dir, str(z))
+    for x_dir in os.listdir(level_dir):
+        # Skip stray files and folders such as '.DS_Store'
+        if not x_dir.isdigit() or not os.path.isdir(os.path.join(level_dir, x_dir)):
+            continue
+        for file_name in os.listdir(os.path.join(level_dir, x_dir)):
+            y, extension = os.path.splitext(file_name)
+            if extension == ".png" and y.isdigit():
+                tiles.append((int(x_dir), int(y), os.path.join(level_dir, x_dir, file_name)))
+    tiles.sort()
+
+    tile_bytes  = tile_size * tile_size * 4
+    data_start  = -(-(HEADER_DTYPE.itemsize + len(tiles) * INDEX_DTYPE.itemsize) // PAGE_SIZE) * PAGE_SIZE
+
+    index           = np.zeros(len(tiles), dtype=INDEX_DTYPE)
+    index["x"]      = [x for x, _, _ in tiles]
+    index["y"]      = [y for _, y, _ in tiles]
+    index["offset"] = data_start + np.arange(len(tiles), dtype=np.uint64) * tile_bytes
+
+    header      = np.array([(PACK_MAGIC, PACK_VERSION, z, tile_size, len(tiles))], dtype=HEADER_DTYPE)
+
+    os.makedirs(pack_dir, exist_ok=True)
+    with open(pack_path(pack_dir, z), "wb") as f:
+        f.write(header.tobytes())
+        f.write(index.tobytes())
+        f.write(bytes(data_start - f.tell()))
+
+        for _, _, path in tiles:
+            image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+            if image is None:
+                # Keep the index intact, broken tiles become transparent
+                f.write(bytes(tile_bytes))
+                continue
+            pixels = convert_image(image)
+            if pixels.shape[:2] != (tile_size, tile_size):
+                pixels = cv2.resize(pixels, (tile_size, tile_size), interpolation = cv2.INTER_AREA)
+            f.write(pixels.tobytes())
+
+    return len(tiles)
+
+
+
+class TilePack:
+    """Memory-mapped tile pack of one zoom level, tiles are handed out as zero-copy views."""
+
+    def __init__(self, path: str):
+        self._file  = open(path, "rb")
+        self._mmap  = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header      = np.frombuffer(self._mmap, dtype=HEADER_DTYPE, count=1)[0]
+        if header["magic"] != PACK_MAGIC or header["version"] != PACK_VERSION:
+            raise ValueError("'{}' is not a tile pack of version {}".format(path, PACK_VERSION))
+
+        self._z         = int(header["z"])
+        self._tile_size = int(header["tile_size"])
+
+        index           = np.frombuffer(self._mmap, dtype=INDEX_DTYPE, count=int(header["no_tiles"]), offset=HEADER_DTYPE.itemsize)
+        self._offsets:  Dict[Tuple[int, int], int] = dict(zip(zip(index["x"].tolist(), index["y"].tolist()), index["offset"].tolist()))
+
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+
+    # === Read only Properties ===
+
+    @property
+    def z(self) -> int:
+        return self._z
+
+
+    @property
+    def tile_size(self) -> int:
+        return self._tile_size
+
+
+    # === Public Methods ===
+
+    def keys(self) -> List[Tuple[int, int]]:
+        return sorted(self._offsets.keys())
+
+
+    def get(self, x: int, y: int) -> NDArray[np.uint8] | None:
+        """Read-only view of tile (x, y) inside the mapped file, None if the pack does not have it."""
+        offset = self._offsets.get((x, y))
+        if offset is None:
+            return None
+        count = self._tile_size * self._tile_size * 4
+        return np.frombuffer(self._mmap, dtype=np.uint8, count=count, offset=offset).reshape(self._tile_size, self._tile_size, 4)
+
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+
+
+def open_packs(pack_dir: str) -> Dict[int, TilePack]:
+    """Open all tile packs of a directory, keyed by zoom level."""
+    if not os.path.isdir(pack_dir):
+        return {}
+    packs = {}
+    for file_name in os.listdir(pack_dir):
+        if file_name.endswith(".pack"):
+            pack = TilePack(os.path.join(pack_dir, file_name))
+            packs[pack.z] = pack
+    return packs
@@ -0,0 +1,82 @@
+import glm
+from typing import Set, Tuple
+
+from engine.camera import PivotCamera
+from engine.frustum import Frustum
+from engine.model import Airplane
+from engine.tile_loader import TileKey
+
+
+def tiles_around(x: float, y: float, radius: float, z: int) -> Set[TileKey]:
+    """All tiles of level z overlapping the square of half size 'radius' around world position (x, y)."""
+    tile_size   = 2.0 / (2 ** z)
+    last        = 2 ** z - 1
+
+    # Tile rows (x) count from the top, columns (y) from the left
+    rows        = range(max(int((1 - (y + radius)) // tile_size), 0), min(int((1 - (y - radius)) // tile_size), last) + 1)
+    columns     = range(max(int((x - radius + 1) // tile_size), 0), min(int((x + radius + 1) // tile_size), last) + 1)
+    return {(row, column, z) for row in rows for column in columns}
+
+
+
+class TilePrefetcher:
+    """
+    Predicts which tiles are needed soon. The camera is moved along the
+    current flight path of the airplane and the tiles visible from those
+    future poses are culled with a frustum of their own, so the result cache
+    of the main frustum is not disturbed. Tiles around the
+    mission target are warmed once per mission.
+    """
+
+    def __init__(self,
+                frustum:        Frustum,
+                lookahead:      float,
+                no_steps:       int,
+                target_radius:  float,
+                target_min_z:   int,
+                target_max_z:   int):
+        self._frustum       = frustum
+        self._lookahead     = lookahead
+        self._no_steps      = no_steps
+        self._target_radius = target_radius
+        self._target_levels = range(target_min_z, target_max_z + 1)
+
+        self._warm:         Set[TileKey]    = set()
+
+
+    # === Read only Properties ===
+
+    @property
+    def frustum(self) -> Frustum:
+        return self._frustum
+
+
+    @property
+    def warm_tiles(self) -> Set[TileKey]:
+        return self._warm
+
+
+    # === Public Methods ===
+
+    def predict(self, plane: Airplane, camera: PivotCamera) -> Set[TileKey]:
+        """Tiles visible after 1 .. no_steps equal parts of 'lookahead' seconds of straight flight."""
+        tiles = set()
+        if plane.velocity <= 0 or self._lookahead <= 0:
+            return tiles
+
+        vp_matrix = camera.projection_matrix * camera.view_matrix
+        for step in range(1, self._no_steps + 1):
+            offset          = plane.forward * plane.velocity * self._lookahead * step / self._no_steps
+            offset.z        = max(offset.z, -plane.position.z)
+
+            # Shifting pivot and camera by the same offset only translates the view
+            future_vp       = vp_matrix * glm.translate(glm.mat4(1.0), -offset)
+            tiles           |= self._frustum.cull(future_vp, camera.cam_pos + offset)
+        return tiles
+
+
+    def warm(self, position: Tuple[float, float]):
+        """Replace the warm tiles by the tiles around a world position, for all target levels."""
+        self._warm = set()
+        for z in self._target_levels:
+            self._warm |= tiles_around(*position, self._target_radius, z)
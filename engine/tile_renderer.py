@@ -0,0 +1,118 @@
+import glm
+import numpy as np
+from numpy.typing import NDArray
+from typing import Tuple
+from OpenGL.GL import *
+
+from engine.primitives import Plane
+from engine.shader import Shader, Program
+from engine.tile_loader import TILE_SIZE
+from engine.vao import VAO
+
+
+# center (xy), scale, layer, texture region offset (xy) and scale (zw)
+INSTANCE_SIZE   = 8
+
+
+def tile_instance(x: int, y: int, z: int, layer: int, source: Tuple[int, int, int] | None = None) -> Tuple[float, ...]:
+    """
+    Instance attributes of tile (x, y, z) stored in texture 'layer'. If an
+    ancestor tile is given as 'source', the layer holds the ancestor and only
+    the matching sub-rectangle of it is shown.
+    """
+    center      = 2**z // 2
+    scale       = 2 / 2**z
+    x_pos       = 2 * (-x + center - 0.5) / 2**z
+    y_pos       = 2 * (y - center + 0.5) / 2**z
+
+    # x counts rows from the top, y counts columns from the left
+    sx, sy, sz  = source if source is not None else (x, y, z)
+    n           = 2 ** (z - sz)
+    row, col    = x - sx * n, y - sy * n
+    return (y_pos, x_pos, scale, layer, col / n, 1 - (row + 1) / n, 1 / n, 1 / n)
+
+
+
+class TileRenderer:
+    """
+    Draws all map tiles with a single instanced draw call. Tile images live in
+    the layers of one GL_TEXTURE_2D_ARRAY, position, scale, layer and texture
+    region of every tile come from an instance buffer.
+    """
+
+    def __init__(self, no_layers: int):
+        self._no_layers     = no_layers
+        self._vao           = VAO(Plane())
+        self._no_instances  = 0
+
+
+    # === Read only Properties ===
+
+    @property
+    def no_layers(self) -> int:
+        return self._no_layers
+
+
+    # === Public Methods ===
+
+    def initializeGL(self):
+        vertex_shader           = Shader("shaders/tile_vertex_shader.glsl", GL_VERTEX_SHADER)
+        fragment_shader         = Shader("shaders/tile_fragment_shader.glsl", GL_FRAGMENT_SHADER)
+        self._program           = Program(vertex_shader, fragment_shader)
+        self._uniform_locations = {name: self._program.get_uniform_location(name) for name in ["view", "projection"]}
+
+        # Not every driver supports arbitrary many layers
+        self._no_layers = min(self._no_layers, glGetIntegerv(GL_MAX_ARRAY_TEXTURE_LAYERS))
+
+        self._texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D_ARRAY, self._texture)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexImage3D(GL_TEXTURE_2D_ARRAY, 0, GL_RGBA8, TILE_SIZE, TILE_SIZE, self._no_layers, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+
+        # Attach the per-tile attributes to the plane VAO
+        self._vao.initializeGL()
+        self._instance_vbo = glGenBuffers(1)
+        self._vao.use()
+        glBindBuffer(GL_ARRAY_BUFFER, self._instance_vbo)
+        stride = INSTANCE_SIZE * np.dtype(np.float32).itemsize
+        for i, location in enumerate([2, 3]):
+            glVertexAttribPointer(location, 4, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(i * stride // 2))
+            glEnableVertexAttribArray(location)
+            glVertexAttribDivisor(location, 1)
+        glBindVertexArray(0)
+
+
+    def upload(self, layer: int, pixels: NDArray[np.uint8]):
+        """Copy a decoded TILE_SIZE x TILE_SIZE RGBA tile into a texture layer."""
+        glBindTexture(GL_TEXTURE_2D_ARRAY, self._texture)
+        glTexSubImage3D(GL_TEXTURE_2D_ARRAY, 0, 0, 0, layer, TILE_SIZE, TILE_SIZE, 1, GL_RGBA, GL_UNSIGNED_BYTE, pixels)
+
+
+    def update_instances(self, instances: NDArray[np.float32]):
+        """Replace the tiles to draw, one row of INSTANCE_SIZE attributes per tile."""
+        self._no_instances = len(instances)
+        glBindBuffer(GL_ARRAY_BUFFER, self._instance_vbo)
+        glBufferData(GL_ARRAY_BUFFER, instances.nbytes, instances, GL_STREAM_DRAW)
+
+
+    def render(self, view_matrix: glm.mat4, projection_matrix: glm.mat4):
+        if self._no_instances == 0:
+            return
+
+        self._program.use()
+        glUniformMatrix4fv(self._uniform_locations["view"], 1, GL_FALSE, view_matrix.to_bytes())
+        glUniformMatrix4fv(self._uniform_locations["projection"], 1, GL_FALSE, projection_matrix.to_bytes())
+
+        glBindTexture(GL_TEXTURE_2D_ARRAY, self._texture)
+        self._vao.use()
+        self._vao.render_instanced(self._no_instances)
+
+
+    def release(self):
+        self._program.release()
+        self._vao.release()
+        glDeleteBuffers(1, [self._instance_vbo])
+        glDeleteTextures([self._texture])
@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import threading
+import numpy as np
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+
+class _NullSpan:
+    """Handed out while tracing is disabled, entering and leaving it does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+
+class _Span:
+
+    __slots__ = ("_tracer", "_name", "_start")
+
+    def __init__(self, tracer: "Tracer", name: str):
+        self._tracer    = tracer
+        self._name      = name
+        self._start     = 0
+
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+
+    def __exit__(self, *exc):
+        self._tracer._record(self._name, self._start, time.perf_counter_ns() - self._start)
+        return False
+
+
+
+class Tracer:
+    """
+    Named spans of work on any thread. Every span becomes an event of a
+    bounded buffer that can be written as Chrome trace (chrome://tracing,
+    ui.perfetto.dev), its duration also goes into a rolling window per name.
+    'frame' marks frame boundaries, frames slower than 'stutter_factor' times
+    the median frame of the window count as stutters. While disabled, 'span'
+    returns a shared no-op context and nothing is recorded.
+    """
+
+    def __init__(self, enabled: bool = False, window: int = 600, stutter_factor: float = 2.0, max_events: int = 100000):
+        self._enabled           = enabled
+        self._window            = window
+        self._stutter_factor    = stutter_factor
+
+        # (name, thread id, start ns, duration ns)
+        self._events:       Deque[Tuple[str, int, int, int]]    = deque(maxlen=max_events)
+        self._durations:    Dict[str, Deque[int]]               = {}
+        self._frames:       Deque[int]                          = deque(maxlen=window)
+        self._last_frame:   int | None                          = None
+
+
+    # === Read / Write Properties ===
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+
+    @enabled.setter
+    def enabled(self, enabled: bool):
+        # A frame spanning the disabled time would count as stutter
+        self._last_frame    = None
+        self._enabled       = enabled
+
+
+    # === Read only Properties ===
+
+    @property
+    def no_events(self) -> int:
+        return len(self._events)
+
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """p50 / p95 / p99 in ms over the window of frame times ('frame') and of every span name."""
+        stats = {}
+        for name, durations in [("frame", self._frames)] + sorted(self._durations.items()):
+            if not durations:
+                continue
+            values                  = np.array(durations) / 1e6
+            p50, p95, p99           = np.percentile(values, [50, 95, 99])
+            stats[name]             = {"count": len(values), "p50": float(p50), "p95": float(p95), "p99": float(p99)}
+        if "frame" in stats:
+            stats["frame"]["stutters"] = int(np.count_nonzero(np.array(self._frames) / 1e6 > self._stutter_factor * stats["frame"]["p50"]))
+        return stats
+
+
+    # === Private Methods ===
+
+    def _record(self, name: str, start: int, duration: int):
+        self._events.append((name, threading.get_ident(), start, duration))
+        durations = self._durations.get(name)
+        if durations is None:
+            durations = self._durations.setdefault(name, deque(maxlen=self._window))
+        durations.append(duration)
+
+
+    # === Public Methods ===
+
+    def configure(self, window: int, stutter_factor: float, max_events: int):
+        self._window            = window
+        self._stutter_factor    = stutter_factor
+        self._events            = deque(self._events, maxlen=max_events)
+        self._frames            = deque(self._frames, maxlen=window)
+        self._durations         = {name: deque(durations, maxlen=window) for name, durations in self._durations.items()}
+
+
+    def span(self, name: str):
+        """Context manager timing the enclosed block as span 'name'."""
+        if not self._enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+
+    def frame(self):
+        """Mark the start of a new frame, the time since the last mark is one frame."""
+        if not self._enabled:
+            return
+        now = time.perf_counter_ns()
+        if self._last_frame is not None:
+            self._frames.append(now - self._last_frame)
+            self._events.append(("frame", threading.get_ident(), self._last_frame, now - self._last_frame))
+        self._last_frame = now
+
+
+    def clear(self):
+        self._events.clear()
+        self._durations.clear()
+        self._frames.clear()
+        self._last_frame = None
+
+
+    def export_chrome(self, path: str) -> int:
+        """Write all buffered events as Chrome trace JSON, returns the number of events written."""
+        pid         = os.getpid()
+        threads     = {thread.ident: thread.name for thread in threading.enumerate()}
+        events      = list(self._events)
+
+        trace: List[Dict] = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "PlaneSim"}}]
+        for tid in sorted({tid for _, tid, _, _ in events}):
+            trace.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": threads.get(tid, str(tid))}})
+        for name, tid, start, duration in events:
+            trace.append({"name": name, "cat": "frame" if name == "frame" else "span", "ph": "X",
+                          "pid": pid, "tid": tid, "ts": start / 1e3, "dur": duration / 1e3})
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+
+
+# Process wide tracer, configured and enabled by the app
+TRACER = Tracer()
@@ -0,0 +1,296 @@
+import numpy as np
+from numba import njit
+from numpy.typing import NDArray
+from typing import List, Tuple
+
+# Kernels over all rows of the store, one call per tick instead of a few dozen numpy
+# calls with fancy-index copies. Matrices are (column, row), quaternions (w, x, y, z).
+
+@njit
+def _write_matrix(matrices: NDArray[np.float32], i: int, px: float, py: float, pz: float,
+                  w: float, x: float, y: float, z: float, scales: NDArray[np.float32]):
+    """translation * rotation * scale of one row, rotation columns scaled per axis."""
+    sx, sy, sz      = scales[i, 0], scales[i, 1], scales[i, 2]
+    matrices[i, 0, 0] = (1 - 2 * (y * y + z * z)) * sx
+    matrices[i, 0, 1] = 2 * (x * y + w * z) * sx
+    matrices[i, 0, 2] = 2 * (x * z - w * y) * sx
+    matrices[i, 1, 0] = 2 * (x * y - w * z) * sy
+    matrices[i, 1, 1] = (1 - 2 * (x * x + z * z)) * sy
+    matrices[i, 1, 2] = 2 * (y * z + w * x) * sy
+    matrices[i, 2, 0] = 2 * (x * z + w * y) * sz
+    matrices[i, 2, 1] = 2 * (y * z - w * x) * sz
+    matrices[i, 2, 2] = (1 - 2 * (x * x + y * y)) * sz
+    matrices[i, 3, 0] = px
+    matrices[i, 3, 1] = py
+    matrices[i, 3, 2] = pz
+
+
+@njit
+def _integrate_rows(positions: NDArray[np.float32], orientations: NDArray[np.float32], speeds: NDArray[np.float32],
+                    ground_clamp: NDArray[np.bool_], dirty: NDArray[np.bool_], delta: float) -> int:
+    """Move rows with a speed along their normalized forward (y) column, returns the number moved."""
+    moved = 0
+    for i in range(len(speeds)):
+        if speeds[i] == 0:
+            continue
+        w, x, y, z      = orientations[i, 0], orientations[i, 1], orientations[i, 2], orientations[i, 3]
+        fx              = 2 * (x * y - w * z)
+        fy              = 1 - 2 * (x * x + z * z)
+        fz              = 2 * (y * z + w * x)
+        step            = speeds[i] * delta / np.sqrt(fx * fx + fy * fy + fz * fz)
+        positions[i, 0] += fx * step
+        positions[i, 1] += fy * step
+        positions[i, 2] += fz * step
+        if ground_clamp[i] and positions[i, 2] < 0:
+            positions[i, 2] = 0
+        dirty[i]        = True
+        moved           += 1
+    return moved
+
+
+@njit
+def _update_rows(matrices: NDArray[np.float32], render_matrices: NDArray[np.float32], positions: NDArray[np.float32],
+                 orientations: NDArray[np.float32], scales: NDArray[np.float32], dirty: NDArray[np.bool_], generations: NDArray[np.int64]):
+    for i in range(len(dirty)):
+        if not dirty[i]:
+            continue
+        _write_matrix(matrices, i, positions[i, 0], positions[i, 1], positions[i, 2],
+                      orientations[i, 0], orientations[i, 1], orientations[i, 2], orientations[i, 3], scales)
+        render_matrices[i]  = matrices[i]
+        dirty[i]            = False
+        generations[i]      += 1
+
+
+@njit
+def _interpolate_rows(render_matrices: NDArray[np.float32], previous_positions: NDArray[np.float32], positions: NDArray[np.float32],
+                      previous_orientations: NDArray[np.float32], orientations: NDArray[np.float32], scales: NDArray[np.float32],
+                      alive: NDArray[np.bool_], has_previous: NDArray[np.bool_], alpha: float):
+    for i in range(len(alive)):
+        if not alive[i]:
+            continue
+        blend = alpha if has_previous[i] else 1.0
+
+        # Take the shorter way around, q and -q are the same rotation
+        sign = 1.0
+        if (previous_orientations[i, 0] * orientations[i, 0] + previous_orientations[i, 1] * orientations[i, 1] +
+                previous_orientations[i, 2] * orientations[i, 2] + previous_orientations[i, 3] * orientations[i, 3]) < 0:
+            sign = -1.0
+        q       = np.empty(4)
+        norm    = 0.0
+        for k in range(4):
+            previous    = sign * previous_orientations[i, k]
+            q[k]        = previous + (orientations[i, k] - previous) * blend
+            norm        += q[k] * q[k]
+        q       /= np.sqrt(norm)
+
+        _write_matrix(render_matrices, i,
+                      previous_positions[i, 0] + (positions[i, 0] - previous_positions[i, 0]) * blend,
+                      previous_positions[i, 1] + (positions[i, 1] - previous_positions[i, 1]) * blend,
+                      previous_positions[i, 2] + (positions[i, 2] - previous_positions[i, 2]) * blend,
+                      q[0], q[1], q[2], q[3], scales)
+
+
+
+class TransformStore():
+    """
+    Positions, orientations and scales of all models as structure of arrays.
+    Models own one row and only flag it dirty when they change, the model
+    matrices of all dirty rows are then computed in one batched operation.
+    Matrices are stored column-major, every row is ready for glUniformMatrix4fv.
+    Rows with a speed move along their local forward axis, all in one step.
+    The state of the last simulation step is kept, so rendered frames can
+    interpolate between two steps.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self._positions:    NDArray[np.float32] = np.zeros((capacity, 3), dtype=np.float32)
+        self._orientations: NDArray[np.float32] = np.tile(np.array([1, 0, 0, 0], dtype=np.float32), (capacity, 1))     # (w, x, y, z)
+        self._scales:       NDArray[np.float32] = np.ones((capacity, 3), dtype=np.float32)
+        self._matrices:     NDArray[np.float32] = np.tile(np.eye(4, dtype=np.float32), (capacity, 1, 1))
+        self._speeds:       NDArray[np.float32] = np.zeros(capacity, dtype=np.float32)
+        self._ground_clamp: NDArray[np.bool_]   = np.zeros(capacity, dtype=bool)
+        self._dirty:        NDArray[np.bool_]   = np.zeros(capacity, dtype=bool)
+        self._alive:        NDArray[np.bool_]   = np.zeros(capacity, dtype=bool)
+        self._generations:  NDArray[np.int64]   = np.zeros(capacity, dtype=np.int64)
+
+        # State at the end of the last two simulation steps and the interpolated matrices drawn
+        self._previous_positions:       NDArray[np.float32] = self._positions.copy()
+        self._previous_orientations:    NDArray[np.float32] = self._orientations.copy()
+        self._has_previous:             NDArray[np.bool_]   = np.zeros(capacity, dtype=bool)
+        self._step_positions:           NDArray[np.float32] = self._positions.copy()
+        self._step_orientations:        NDArray[np.float32] = self._orientations.copy()
+        self._has_step:                 NDArray[np.bool_]   = np.zeros(capacity, dtype=bool)
+        self._render_matrices:          NDArray[np.float32] = self._matrices.copy()
+
+        self._has_dirty:    bool                = False     # any row dirty, 'update' returns early otherwise
+        self._free:         List[int]           = list(range(capacity - 1, -1, -1))
+        self._no_rows       = 0
+
+
+    # === Read only Properties ===
+
+    @property
+    def positions(self) -> NDArray[np.float32]:
+        return self._positions
+
+
+    @property
+    def orientations(self) -> NDArray[np.float32]:
+        return self._orientations
+
+
+    @property
+    def scales(self) -> NDArray[np.float32]:
+        return self._scales
+
+
+    @property
+    def speeds(self) -> NDArray[np.float32]:
+        """World units per second along the local forward axis."""
+        return self._speeds
+
+
+    @property
+    def ground_clamp(self) -> NDArray[np.bool_]:
+        """Rows that are kept at or above z = 0 while moving."""
+        return self._ground_clamp
+
+
+    @property
+    def matrices(self) -> NDArray[np.float32]:
+        """Model matrices of all rows, (rows, column, row) i.e. column-major, up to date after 'update'."""
+        return self._matrices
+
+
+    @property
+    def generations(self) -> NDArray[np.int64]:
+        """Counts per row how often 'update' recomputed its matrix, to validate copies of it."""
+        return self._generations
+
+
+    @property
+    def render_matrices(self) -> NDArray[np.float32]:
+        """Model matrices to draw, interpolated between the last two steps by 'interpolate'."""
+        return self._render_matrices
+
+
+    @property
+    def no_rows(self) -> int:
+        return self._no_rows
+
+
+    # === Private Methods ===
+
+    def _grow(self):
+        capacity            = len(self._positions)
+        self._positions     = np.concatenate([self._positions, np.zeros((capacity, 3), dtype=np.float32)])
+        self._orientations  = np.concatenate([self._orientations, np.tile(np.array([1, 0, 0, 0], dtype=np.float32), (capacity, 1))])
+        self._scales        = np.concatenate([self._scales, np.ones((capacity, 3), dtype=np.float32)])
+        self._matrices      = np.concatenate([self._matrices, np.tile(np.eye(4, dtype=np.float32), (capacity, 1, 1))])
+        self._speeds        = np.concatenate([self._speeds, np.zeros(capacity, dtype=np.float32)])
+        self._ground_clamp  = np.concatenate([self._ground_clamp, np.zeros(capacity, dtype=bool)])
+        self._dirty         = np.concatenate([self._dirty, np.zeros(capacity, dtype=bool)])
+        self._alive         = np.concatenate([self._alive, np.zeros(capacity, dtype=bool)])
+        self._generations   = np.concatenate([self._generations, np.zeros(capacity, dtype=np.int64)])
+        self._has_previous  = np.concatenate([self._has_previous, np.zeros(capacity, dtype=bool)])
+        self._has_step      = np.concatenate([self._has_step, np.zeros(capacity, dtype=bool)])
+        self._step_positions        = np.concatenate([self._step_positions, np.zeros((capacity, 3), dtype=np.float32)])
+        self._step_orientations     = np.concatenate([self._step_orientations, self._orientations[capacity:]])
+        self._previous_positions    = np.concatenate([self._previous_positions, np.zeros((capacity, 3), dtype=np.float32)])
+        self._previous_orientations = np.concatenate([self._previous_orientations, self._orientations[capacity:]])
+        self._render_matrices       = np.concatenate([self._render_matrices, self._matrices[capacity:]])
+        self._free          = list(range(2 * capacity - 1, capacity - 1, -1)) + self._free
+
+
+    # === Public Methods ===
+
+    def allocate(self) -> int:
+        """Reserve an identity row, rows stay valid while the arrays grow."""
+        if not self._free:
+            self._grow()
+        row                     = self._free.pop()
+        self._positions[row]    = 0
+        self._orientations[row] = (1, 0, 0, 0)
+        self._scales[row]       = 1
+        self._speeds[row]       = 0
+        self._ground_clamp[row] = False
+        self._dirty[row]        = True
+        self._has_dirty         = True
+        self._alive[row]        = True
+        self._has_previous[row] = False
+        self._has_step[row]     = False
+        self._no_rows           += 1
+        return row
+
+
+    def release(self, row: int):
+        self._speeds[row]   = 0
+        self._dirty[row]    = False
+        self._alive[row]    = False
+        self._free.append(row)
+        self._no_rows       -= 1
+
+
+    def mark_dirty(self, row: int):
+        self._dirty[row]    = True
+        self._has_dirty     = True
+
+
+    def is_dirty(self, row: int) -> bool:
+        return self._has_dirty and bool(self._dirty[row])
+
+
+    def integrate(self, delta: float):
+        """Move all rows with a speed along their local forward (y) axis."""
+        if _integrate_rows(self._positions, self._orientations, self._speeds, self._ground_clamp, self._dirty, delta):
+            self._has_dirty = True
+
+
+    def snapshot(self):
+        """
+        Remember the current state as the end of a step, call at the end of
+        every step. Changes between two steps, like input, count towards the
+        next step and are interpolated with it.
+        """
+        self._previous_positions, self._step_positions          = self._step_positions, self._previous_positions
+        self._previous_orientations, self._step_orientations    = self._step_orientations, self._previous_orientations
+        np.copyto(self._step_positions, self._positions)
+        np.copyto(self._step_orientations, self._orientations)
+        self._has_previous[:]   = self._has_step & self._alive
+        self._has_step[:]       = self._alive
+
+
+    def interpolate(self, alpha: float):
+        """
+        Render matrices at 'alpha' between the previous (0) and the current
+        step (1). Positions are blended linearly, orientations by normalized
+        lerp, rows created during the last step are drawn as they are.
+        """
+        if self._no_rows == 0:
+            return
+        _interpolate_rows(self._render_matrices, self._previous_positions, self._positions, self._previous_orientations,
+                          self._orientations, self._scales, self._alive, self._has_previous, alpha)
+
+
+    def bounding_spheres(self, rows: NDArray[np.intp], centers: NDArray[np.float32], radii: NDArray[np.float32]) -> Tuple[NDArray[np.float32], NDArray[np.float32]]:
+        """
+        World space bounding spheres of 'rows' as drawn, i.e. by their render
+        matrices. 'centers' and 'radii' are the model space spheres per row,
+        radii grow with the largest absolute scale of a row.
+        """
+        self.update()
+        matrices    = self._render_matrices[rows]
+        world       = np.einsum("nij,ni->nj", matrices[:, :3, :3], centers) + matrices[:, 3, :3]
+        return world, radii * np.abs(self._scales[rows]).max(axis=1)
+
+
+    def update(self):
+        """Recompute translation * rotation * scale of all dirty rows at once."""
+        if not self._has_dirty:
+            return
+        _update_rows(self._matrices, self._render_matrices, self._positions, self._orientations, self._scales, self._dirty, self._generations)
+        self._has_dirty = False
+
+
+
+TRANSFORM_STORE = TransformStore()
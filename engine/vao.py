@@ -6,25 +6,40 @@ class VAO:
 
     def __init__(self, geometry: Primitive):
         """
-        Combines positions and UVs into flat vertex array.
+        Combines positions and UVs into an indexed vertex array. Every distinct
+        (position index, uv index) pair of the faces becomes one vertex.
         Assumes face_indices and uv_face_indices have same shape.
         """
 
-        vertices        = geometry.vertices
-        uv_vertices     = geometry.uv_vertices   
+        vertices        = np.reshape(geometry.vertices, (-1, 3))
+        uv_vertices     = np.reshape(geometry.uv_vertices, (-1, 2))
         face_indices    = geometry.vertex_indices
         uv_face_indices = geometry.uv_indices
 
         assert face_indices.shape == uv_face_indices.shape, "Mismatched face shapes"
 
-        vertex_data = []
-        for f_idx, uv_idx in zip(face_indices.flatten(), uv_face_indices.flatten()):
-            pos = vertices[f_idx]
-            uv  = uv_vertices[uv_idx]
-            vertex_data.append(np.concatenate([pos, uv]))
+        # Deduplicate corners by a combined key, the inverse mapping becomes the element buffer
+        no_uvs          = len(uv_vertices)
+        corners         = face_indices.ravel().astype(np.int64) * no_uvs + uv_face_indices.ravel()
+        unique, inverse = np.unique(corners, return_inverse=True)
+
+        self._vertex_data   = np.hstack([
+            vertices[unique // no_uvs],
+            uv_vertices[unique % no_uvs]
+        ]).astype(np.float32)
+
+        # 16 bit indices whenever they suffice
+        index_type          = np.uint16 if len(unique) <= np.iinfo(np.uint16).max + 1 else np.uint32
+        self._indices       = inverse.reshape(-1).astype(index_type)
+        self._index_type    = GL_UNSIGNED_SHORT if index_type == np.uint16 else GL_UNSIGNED_INT
+
+        # Bounding sphere around the center of the bounding box, in model space
+        positions               = self._vertex_data[:, :3]
+        self._bounding_center   = (positions.min(axis=0) + positions.max(axis=0)) / 2 if len(positions) else np.zeros(3, dtype=np.float32)
+        self._bounding_radius   = float(np.linalg.norm(positions - self._bounding_center, axis=1).max()) if len(positions) else 0.0
 
-        self._vertex_data   = np.array(vertex_data, dtype=np.float32)
         self._vertex_count  = len(self._vertex_data)
+        self._index_count   = len(self._indices)
         self._initialized   = False
 
 
@@ -33,14 +48,45 @@ class VAO:
         return self._initialized
 
 
+    @property
+    def vertex_count(self) -> int:
+        return self._vertex_count
+
+
+    @property
+    def index_count(self) -> int:
+        return self._index_count
+
+
+    @property
+    def bounding_center(self) -> np.ndarray:
+        return self._bounding_center
+
+
+    @property
+    def bounding_radius(self) -> float:
+        return self._bounding_radius
+
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the vertex and element buffers."""
+        return self._vertex_data.nbytes + self._indices.nbytes
+
+
     def initializeGL(self):
         self._vao = glGenVertexArrays(1)
         self._vbo = glGenBuffers(1)
+        self._ebo = glGenBuffers(1)
 
         glBindVertexArray(self._vao)
         glBindBuffer(GL_ARRAY_BUFFER, self._vbo)
         glBufferData(GL_ARRAY_BUFFER, self._vertex_data.nbytes, self._vertex_data, GL_STATIC_DRAW)
 
+        # The element buffer binding is part of the VAO state
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self._ebo)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, self._indices.nbytes, self._indices, GL_STATIC_DRAW)
+
         stride = self._vertex_data.shape[1] * self._vertex_data.itemsize
         offset = 0
 
@@ -63,9 +109,13 @@ class VAO:
 
 
     def render(self):
-        glDrawArrays(GL_TRIANGLES, 0, self._vertex_count)
+        glDrawElements(GL_TRIANGLES, self._index_count, self._index_type, None)
+
+
+    def render_instanced(self, no_instances: int):
+        glDrawElementsInstanced(GL_TRIANGLES, self._index_count, self._index_type, None, no_instances)
 
 
     def release(self):
         glDeleteVertexArrays(1, [self._vao])
-        glDeleteBuffers(1, [self._vbo])
\ No newline at end of file
+        glDeleteBuffers(2, [self._vbo, self._ebo])
\ No newline at end of file
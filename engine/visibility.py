@@ -0,0 +1,76 @@
+import glm
+import numpy as np
+import geometry as geom
+from numpy.typing import NDArray
+from typing import Dict, List, Sequence
+
+from engine.model import Model
+
+
+class VisibilityCuller:
+    """
+    Culls bounding spheres of objects against the frustum planes of the
+    camera and an optional maximum draw distance per object class. Counts
+    drawn and culled objects per class until 'reset_stats' is called.
+    """
+
+    def __init__(self, max_distances: Dict[str, float]):
+        self._max_distances = max_distances
+
+        self._planes:       NDArray[np.float64]             = np.zeros((6, 4))
+        self._cam_pos:      NDArray[np.float64]             = np.zeros(3)
+        self._stats:        Dict[str, Dict[str, int]]       = {}
+
+
+    # === Read only Properties ===
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Drawn and culled objects per class since the last 'reset_stats'."""
+        return self._stats
+
+
+    # === Public Methods ===
+
+    def update(self, vp_matrix: glm.mat4, cam_pos: glm.vec3):
+        """Start a new frame with the current camera."""
+        self._planes    = geom.frustum_planes(vp_matrix)
+        self._cam_pos   = np.array(cam_pos, dtype=np.float64)
+
+
+    def cull(self, name: str, centers: NDArray[np.float32], radii: NDArray[np.float32]) -> NDArray[np.bool_]:
+        """Mask of the visible spheres of an object class, a max distance of 0 or below means unlimited."""
+        centers         = np.reshape(centers, (-1, 3))
+        radii           = np.reshape(radii, -1)
+        visible         = geom.spheres_in_frustum(self._planes, centers, radii)
+
+        max_distance    = self._max_distances.get(name, 0)
+        if max_distance > 0:
+            visible     &= np.linalg.norm(centers - self._cam_pos, axis=1) - radii <= max_distance
+
+        drawn           = int(np.count_nonzero(visible))
+        stats           = self._stats.setdefault(name, {"drawn": 0, "culled": 0})
+        stats["drawn"]  += drawn
+        stats["culled"] += len(visible) - drawn
+        return visible
+
+
+    def reset_stats(self):
+        self._stats = {}
+
+
+    def cull_models(self, name: str, models: Sequence[Model]) -> List[Model]:
+        """
+        Visible models of a class, culled at their interpolated position as
+        drawn. All models must share one TransformStore, their spheres are
+        transformed in one batch.
+        """
+        if len(models) == 0:
+            self._stats.setdefault(name, {"drawn": 0, "culled": 0})
+            return []
+        rows            = np.fromiter((model.row for model in models), dtype=np.intp, count=len(models))
+        vaos            = [model.vao for model in models]
+        centers, radii  = models[0].store.bounding_spheres(rows, np.array([vao.bounding_center for vao in vaos], dtype=np.float32),
+                                                           np.fromiter((vao.bounding_radius for vao in vaos), dtype=np.float32, count=len(vaos)))
+        visible         = self.cull(name, centers, radii)
+        return [model for model, keep in zip(models, visible) if keep]
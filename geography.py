@@ -1,7 +1,9 @@
 import csv
+import glm
 import utils
 import numpy as np
 import configparser as cfg
+from scipy.spatial import cKDTree
 from typing import Tuple, List
 
 
@@ -14,6 +16,74 @@ class Airport:
         self.type       = type
 
 
+class AirportIndex:
+    """KD-tree over the projected (x, y) positions of airports."""
+
+    def __init__(self, airports: List[Airport]):
+        self._airports  = airports
+        self._positions = np.array([airport.position for airport in airports], dtype=np.float64).reshape(-1, 2)
+        self._tree      = cKDTree(self._positions)
+
+
+    def __len__(self) -> int:
+        return len(self._airports)
+
+
+    def nearest(self, position: Tuple[float, float], k: int = 1) -> List[Tuple[Airport, float]]:
+        """The k closest airports with their distances, closest first."""
+        k                   = min(k, len(self._airports))
+        if k == 0:
+            return []
+        distances, indices  = self._tree.query(position, k=[i + 1 for i in range(k)])
+        return [(self._airports[i], float(d)) for d, i in zip(distances, indices)]
+
+
+    def within(self, position: Tuple[float, float], radius: float) -> List[Airport]:
+        """All airports at most 'radius' away."""
+        return [self._airports[i] for i in sorted(self._tree.query_ball_point(position, radius))]
+
+
+    def band(self, position: Tuple[float, float], min_distance: float, max_distance: float) -> List[Airport]:
+        """All airports between 'min_distance' and 'max_distance' away."""
+        indices     = np.array(self._tree.query_ball_point(position, max_distance), dtype=np.int64)
+        distances   = np.linalg.norm(self._positions[indices] - position, axis=1) if len(indices) else np.zeros(0)
+        return [self._airports[i] for i in sorted(indices[distances >= min_distance])]
+
+
+    def pick(self, ray_start: glm.vec3, ray_end: glm.vec3, height: float, radius: float) -> Airport | None:
+        """
+        The airport whose target cylinder ('height', 'radius') is hit first by
+        the ray, None if the ray misses all of them.
+        """
+        direction = ray_end - ray_start
+        if direction.z == 0 or len(self._airports) == 0:
+            return None
+
+        # Part of the ray between the top of the targets and the ground
+        t_top, t_ground = sorted([(height - ray_start.z) / direction.z, -ray_start.z / direction.z])
+        t_top, t_ground = max(t_top, 0.0), min(t_ground, 1.0)
+        if t_top > t_ground:
+            return None
+        start       = np.array([ray_start.x, ray_start.y]) + np.array([direction.x, direction.y]) * t_top
+        end         = np.array([ray_start.x, ray_start.y]) + np.array([direction.x, direction.y]) * t_ground
+
+        # Candidates around the segment, then the exact distance to the segment
+        center      = (start + end) / 2
+        indices     = np.array(self._tree.query_ball_point(center, np.linalg.norm(end - start) / 2 + radius), dtype=np.int64)
+        if len(indices) == 0:
+            return None
+        segment     = end - start
+        length_sq   = max(float(segment @ segment), 1e-18)
+        t           = np.clip((self._positions[indices] - start) @ segment / length_sq, 0, 1)
+        distances   = np.linalg.norm(self._positions[indices] - (start + t[:, None] * segment), axis=1)
+
+        hits        = distances <= radius
+        if not hits.any():
+            return None
+        return self._airports[indices[hits][np.argmin(t[hits])]]
+
+
+
 class AirportManager:
 
     def __init__(self, airport_csv: str, filter_types: List[str] = ["large_airport"]):
@@ -36,8 +106,14 @@ class AirportManager:
             self.airports.append(airport)
         print("Found '{}' airports!".format(len(self.airports)))
 
+        self.index      = AirportIndex(self.airports)
+        self._by_name   = {airport.name.lower(): airport for airport in reversed(self.airports)}
+
 
     def position_by_name(self, substring: str) -> Tuple[float, float]:
+        airport = self._by_name.get(substring.lower())
+        if airport is not None:
+            return airport.position
         for airport in self.airports:
             if substring.lower() in airport.name.lower():
                 return airport.position
@@ -73,9 +149,17 @@ class MissionManager:
         return self.airport_manager.airports
     
 
-    def new_mission(self) -> Mission:
-        rand_index              = np.random.randint(len(self.airport_manager.airports))
-        self.mission            = Mission(self.airport_manager.airports[rand_index], self.configs.getfloat("target_radius"))
+    def new_mission(self, origin: Tuple[float, float] | None = None) -> Mission:
+        """
+        Pick a random target airport. With an origin, targets are drawn from
+        the configured distance band around it if that band has any airports.
+        """
+        candidates              = self.airport_manager.airports
+        if origin is not None:
+            band                = self.airport_manager.index.band(origin, self.configs.getfloat("mission_min_distance"), self.configs.getfloat("mission_max_distance"))
+            candidates          = band or candidates
+        rand_index              = np.random.randint(len(candidates))
+        self.mission            = Mission(candidates[rand_index], self.configs.getfloat("target_radius"))
         return self.mission
 
         
@@ -21,6 +21,49 @@ def ray_z_plane_intersection(inv_viewproj: glm.mat4, u: float, v: float) -> Tupl
     return intersection.x, intersection.y
 
 
+def ray_z_plane_footprint(inv_viewproj: glm.mat4, u: float, v: float, max_distance: float) -> Tuple[float, float]:
+    """
+    Like ray_z_plane_intersection, but rays that miss the z=0 plane or hit it
+    more than 'max_distance' away (measured in the plane) end at that distance.
+    """
+    start           = glm.vec4(u, v, -1.0, 1.0)
+    end             = glm.vec4(u, v,  1.0, 1.0)
+
+    world_start     = inv_viewproj * start
+    world_end       = inv_viewproj * end
+    world_start     /= world_start.w
+    world_end       /= world_end.w
+
+    direction       = world_end - world_start
+    horizontal      = glm.vec2(direction)
+    length          = glm.length(horizontal)
+
+    # Rays towards the ground within the horizon distance
+    if direction.z < 0:
+        t = -world_start.z / direction.z
+        if length * t <= max_distance:
+            intersection = glm.vec2(world_start) + horizontal * t
+            return intersection.x, intersection.y
+
+    if length == 0:
+        return world_start.x, world_start.y
+    clamped         = glm.vec2(world_start) + horizontal / length * max_distance
+    return clamped.x, clamped.y
+
+
+def frustum_planes(vp_matrix: glm.mat4) -> NDArray[np.float64]:
+    """The six planes (a, b, c, d) of the clip volume in world space, normals point inwards and have unit length."""
+    m       = np.array(vp_matrix, dtype=np.float64)
+    planes  = np.array([m[3] + m[0], m[3] - m[0], m[3] + m[1], m[3] - m[1], m[3] + m[2], m[3] - m[2]])
+    return planes / np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+
+
+def spheres_in_frustum(planes: NDArray[np.float64], centers: NDArray[np.float64], radii: NDArray[np.float64]) -> NDArray[np.bool_]:
+    """Mask of the spheres that are not completely behind one of the planes."""
+    distances = np.reshape(centers, (-1, 3)) @ planes[:, :3].T + planes[:, 3]
+    return np.all(distances >= -np.reshape(radii, (-1, 1)), axis=1)
+
+
 @njit
 def polygon_normals(polygon: NDArray[np.float32]) -> NDArray[np.float32]:
     """Returns the normals (perpendicular vectors) of the polygon edges."""
@@ -52,11 +95,100 @@ def overlap(min_a: float, max_a: float, min_b: float, max_b: float) -> bool:
 @njit
 def test_plane_intersection_2d(points_a: NDArray[np.float32], points_b: NDArray[np.float32]) -> bool:
     """Tests if two convex 2D polygons intersect."""
-    axes = polygon_normals(points_a) + polygon_normals(points_b)
-    for axis in axes:
+    axes = np.concatenate((polygon_normals(points_a), polygon_normals(points_b)))
+    for i in range(len(axes)):
+        axis = axes[i]
         min_a, max_a = project_polygon(points_a, axis)
         min_b, max_b = project_polygon(points_b, axis)
         if not overlap(min_a, max_a, min_b, max_b):
             return False  # Found a separating axis
 
-    return True  # No separating axis found: intersection exists
\ No newline at end of file
+    return True  # No separating axis found: intersection exists
+
+
+@njit
+def cull_quadtree(frustum_points: NDArray[np.float64], cam_pos: NDArray[np.float64], max_z: int, pixels_per_unit: float, max_tile_pixels: float) -> NDArray[np.int64]:
+    """
+    Breadth-first quadtree traversal over the z=0 plane, one level at a time.
+    Tiles intersecting the convex frustum polygon are subdivided while their
+    projected size exceeds 'max_tile_pixels'. The size is estimated at the
+    point of the tile closest to the camera, 'pixels_per_unit' is the height
+    in pixels of one world unit at distance 1. Returns the visible (x, y, z)
+    tiles as rows.
+    """
+
+    # Separating axes: x, y and the non-degenerate frustum edge normals
+    axes        = np.zeros((len(frustum_points) + 2, 2))
+    axes[0, 0]  = 1.0
+    axes[1, 1]  = 1.0
+    no_axes     = 2
+    for i in range(len(frustum_points)):
+        edge = frustum_points[(i + 1) % len(frustum_points)] - frustum_points[i]
+        if edge[0] != 0.0 or edge[1] != 0.0:
+            axes[no_axes, 0] = -edge[1]
+            axes[no_axes, 1] = edge[0]
+            no_axes += 1
+
+    frustum_min = np.empty(no_axes)
+    frustum_max = np.empty(no_axes)
+    for a in range(no_axes):
+        projections     = frustum_points[:, 0] * axes[a, 0] + frustum_points[:, 1] * axes[a, 1]
+        frustum_min[a]  = projections.min()
+        frustum_max[a]  = projections.max()
+
+    tiles       = np.empty((64, 3), dtype=np.int64)
+    no_tiles    = 0
+    xs          = np.zeros(1, dtype=np.int64)
+    ys          = np.zeros(1, dtype=np.int64)
+
+    for z in range(max_z + 1):
+        tile_size   = 2.0 / (2 ** z)
+        subdivide   = z < max_z
+        child_xs    = np.empty(4 * len(xs), dtype=np.int64)
+        child_ys    = np.empty(4 * len(xs), dtype=np.int64)
+        no_children = 0
+
+        for i in range(len(xs)):
+            min_x   = -1.0 + ys[i] * tile_size
+            max_y   = 1.0 - xs[i] * tile_size
+
+            # Tile corners projected onto every axis
+            inside  = True
+            for a in range(no_axes):
+                p0  = min_x * axes[a, 0]
+                p1  = (min_x + tile_size) * axes[a, 0]
+                q0  = (max_y - tile_size) * axes[a, 1]
+                q1  = max_y * axes[a, 1]
+                if max(p0, p1) + max(q0, q1) < frustum_min[a] or min(p0, p1) + min(q0, q1) > frustum_max[a]:
+                    inside = False
+                    break
+            if not inside:
+                continue
+
+            split = False
+            if subdivide:
+                dx      = max(min_x - cam_pos[0], 0.0, cam_pos[0] - (min_x + tile_size))
+                dy      = max(max_y - tile_size - cam_pos[1], 0.0, cam_pos[1] - max_y)
+                dist    = np.sqrt(dx * dx + dy * dy + cam_pos[2] * cam_pos[2])
+                split   = tile_size * pixels_per_unit > max_tile_pixels * dist
+
+            if split:
+                for c in range(4):
+                    child_xs[no_children] = 2 * xs[i] + c // 2
+                    child_ys[no_children] = 2 * ys[i] + c % 2
+                    no_children += 1
+            else:
+                if no_tiles == len(tiles):
+                    grown           = np.empty((2 * len(tiles), 3), dtype=np.int64)
+                    grown[:no_tiles] = tiles
+                    tiles           = grown
+                tiles[no_tiles, 0] = xs[i]
+                tiles[no_tiles, 1] = ys[i]
+                tiles[no_tiles, 2] = z
+                no_tiles += 1
+
+        if no_children == 0:
+            break
+        xs, ys = child_xs[:no_children], child_ys[:no_children]
+
+    return tiles[:no_tiles]
@@ -1,65 +1,248 @@
+import os
+import re
+import hashlib
 import numpy as np
+from numpy.typing import NDArray
+from typing import Dict
 
 
-class OBJ_Parser:
+# Parsed OBJ data, one array per attribute name of OBJ_Parser
+ObjData = Dict[str, NDArray]
 
-    def __init__(self, path, normalize = True):
-        self.vertex_positions   = []
-        self.vertex_indices     = []
-        self.normals            = []
-        self.normal_indices     = []
-        self.uv_positions       = []
-        self.uv_indices         = []
-        self._parse(path)
+OBJ_ARRAYS = [
+    ("vertex_positions",    np.float32, 3),
+    ("vertex_indices",      np.int32,   1),
+    ("normals",             np.float32, 3),
+    ("normal_indices",      np.int32,   1),
+    ("uv_positions",        np.float32, 2),
+    ("uv_indices",          np.int32,   1),
+]
+
+# Mesh cache layout, all numbers little endian:
+#   header      CACHE_HEADER_DTYPE, size and mtime of the source OBJ and the number of rows per array
+#   arrays      OBJ_ARRAYS in order, each starting at a multiple of CACHE_ALIGNMENT
+CACHE_MAGIC         = b"PSMC"
+CACHE_VERSION       = 1
+CACHE_ALIGNMENT     = 16
+CACHE_HEADER_DTYPE  = np.dtype([("magic", "S4"), ("version", "<u4"), ("size", "<u8"), ("mtime_ns", "<u8"), ("rows", "<u8", len(OBJ_ARRAYS))])
+
+
+def _align(offset: int) -> int:
+    return -(-offset // CACHE_ALIGNMENT) * CACHE_ALIGNMENT
+
+
+def _empty_obj_data() -> ObjData:
+    return {name: np.zeros((0, width) if width > 1 else 0, dtype=dtype) for name, dtype, width in OBJ_ARRAYS}
+
+
+def read_obj_lines(path: str) -> ObjData:
+    """Reference parser, reads the OBJ line by line. Handles faces mixing corner formats."""
+    vertex_positions    = []
+    vertex_indices      = []
+    normals             = []
+    normal_indices      = []
+    uv_positions        = []
+    uv_indices          = []
+
+    with open(path, 'r') as f:
+        for line in f:
+            parts = line.strip().split()
+            if not parts or parts[0].startswith('#'):
+                continue
+
+            if parts[0] == 'v':  # Vertex position
+                vertex_positions.append([float(x) for x in parts[1:4]])
+
+            elif parts[0] == 'vn':  # Normals
+                normals.append([float(x) for x in parts[1:4]])
+
+            elif parts[0] == 'vt':  # Texture coordinate
+                uv_positions.append([float(x) for x in parts[1:3]])
+
+            elif parts[0] == 'f':
+                face_vertices = [v.split('/') for v in parts[1:]]
+                num_vertices = len(face_vertices)
+
+                # Triangulate the polygon (fan triangulation)
+                for i in range(1, num_vertices - 1):
+                    tri = [face_vertices[0], face_vertices[i], face_vertices[i + 1]]
+                    for v in tri:
+                        vi = int(v[0]) - 1
+                        vertex_indices.append(vi)
+
+                        if len(v) > 1 and v[1]:
+                            ti = int(v[1]) - 1
+                            uv_indices.append(ti)
+
+                        if len(v) > 2 and v[2]:
+                            ti = int(v[2]) - 1
+                            normal_indices.append(ti)
+
+    data = _empty_obj_data()
+    for name, values in [("vertex_positions", vertex_positions), ("vertex_indices", vertex_indices), ("normals", normals),
+                         ("normal_indices", normal_indices), ("uv_positions", uv_positions), ("uv_indices", uv_indices)]:
+        if values:
+            data[name] = np.array(values, dtype=data[name].dtype)
+    return data
+
+
+def _parse_rows(bodies: list, width: int) -> NDArray[np.float32] | None:
+    """Parse the number rows of all lines of one kind at once, keeps the first 'width' columns."""
+    if not bodies:
+        return np.zeros((0, width), dtype=np.float32)
+    values      = np.fromstring("\n".join(bodies), dtype=np.float32, sep=" ")
+    columns     = len(bodies[0].split())
+    if columns < width or len(values) != len(bodies) * columns:
+        return None
+    return values.reshape(-1, columns)[:, :width]
 
-        if normalize:
-            self._normalize()
 
+def read_obj(path: str) -> ObjData:
+    """
+    Vectorized parser. All lines of one kind are gathered with a single
+    regular expression and converted in bulk, faces are fan-triangulated
+    with index arithmetic. Files with indented lines, rows of varying length
+    or faces mixing corner formats fall back to read_obj_lines.
+    """
+    with open(path, 'r') as f:
+        text = "\n" + f.read().replace("\r", "")
 
-    def _parse(self, path):
+    # A literal line start keeps the expressions fast, indented lines take the slow path
+    if re.search(r"\n[ \t]+[vf]", text):
+        return read_obj_lines(path)
 
-        with open(path, 'r') as f:
-            for line in f:
-                parts = line.strip().split()
-                if not parts or parts[0].startswith('#'):
-                    continue
+    data        = _empty_obj_data()
+    rows        = {kind: re.findall(r"\n{}[ \t]+([^\n]*)".format(kind), text) for kind in ["v", "vt", "vn", "f"]}
 
-                if parts[0] == 'v':  # Vertex position
-                    self.vertex_positions.append([float(x) for x in parts[1:]])
+    for name, kind, width in [("vertex_positions", "v", 3), ("uv_positions", "vt", 2), ("normals", "vn", 3)]:
+        values = _parse_rows(rows[kind], width)
+        if values is None:
+            return read_obj_lines(path)
+        data[name] = np.ascontiguousarray(values)
 
-                elif parts[0] == 'vn':  # Normals
-                    self.normals.append([float(x) for x in parts[1:]])
+    faces = rows["f"]
+    if not faces:
+        return data
 
-                elif parts[0] == 'vt':  # Texture coordinate
-                    self.uv_positions.append([float(x) for x in parts[1:3]])
+    # The first corner decides the format: v, v/t, v//n or v/t/n
+    block       = "\n".join(faces)
+    first       = faces[0].split()[0]
+    has_uv      = first.count("/") >= 1 and "//" not in first
+    has_normal  = first.count("/") == 2
+    no_fields   = 1 + has_uv + has_normal
 
-                elif parts[0] == 'f':
-                    face_vertices = [v.split('/') for v in parts[1:]]
-                    num_vertices = len(face_vertices)
+    # Number of corners per face: count token starts per line
+    chars       = np.frombuffer(block.encode(), dtype=np.uint8)
+    blank       = (chars == ord(" ")) | (chars == ord("\t")) | (chars == ord("\n"))
+    starts      = np.flatnonzero(~blank & np.concatenate([[True], blank[:-1]]))
+    line_ids    = np.searchsorted(np.flatnonzero(chars == ord("\n")), starts)
+    no_corners  = np.bincount(line_ids, minlength=len(faces))
 
-                    # Triangulate the polygon (fan triangulation)
-                    for i in range(1, num_vertices - 1):
-                        tri = [face_vertices[0], face_vertices[i], face_vertices[i + 1]]
-                        for v in tri:
-                            vi = int(v[0]) - 1
-                            self.vertex_indices.append(vi)
+    # Every corner must share the format of the first one
+    total       = no_corners.sum()
+    if np.any(no_corners < 3) or block.count("/") != total * first.count("/") or block.count("//") != total * first.count("//"):
+        return read_obj_lines(path)
 
-                            if len(v) > 1 and v[1]:
-                                ti = int(v[1]) - 1
-                                self.uv_indices.append(ti)
+    values      = np.fromstring(block.replace("//", " ").replace("/", " "), dtype=np.int64, sep=" ")
+    if len(values) != total * no_fields:
+        return read_obj_lines(path)
+    corners     = values.reshape(-1, no_fields) - 1
 
-                            if len(v) > 1 and v[2]:
-                                ti = int(v[2]) - 1
-                                self.normal_indices.append(ti)
+    # Fan triangulation: corners (0, i, i + 1) for i in 1 .. n - 2 of every face
+    no_tris     = no_corners - 2
+    face_start  = np.repeat(np.cumsum(no_corners) - no_corners, no_tris)
+    local       = np.arange(no_tris.sum()) - np.repeat(np.cumsum(no_tris) - no_tris, no_tris) + 1
+    triangles   = np.stack([face_start, face_start + local, face_start + local + 1], axis=1).ravel()
+    corners     = corners[triangles].astype(np.int32)
 
+    data["vertex_indices"] = corners[:, 0].copy()
+    if has_uv:
+        data["uv_indices"] = corners[:, 1].copy()
+    if has_normal:
+        data["normal_indices"] = corners[:, -1].copy()
+    return data
 
-        # Convert to numpy arrays
-        self.vertex_positions   = np.array(self.vertex_positions, dtype=np.float32)
-        self.vertex_indices     = np.array(self.vertex_indices, dtype=np.int32)
-        self.normals            = np.array(self.normals, dtype=np.float32)
-        self.normal_indices     = np.array(self.normal_indices, dtype=np.int32)
-        self.uv_positions       = np.array(self.uv_positions, dtype=np.float32)
-        self.uv_indices         = np.array(self.uv_indices, dtype=np.int32)
+
+def cache_path(cache_dir: str, path: str) -> str:
+    """Cache file of an OBJ, named after its absolute path."""
+    path = os.path.abspath(path)
+    return os.path.join(cache_dir, "{}-{}.mesh".format(os.path.basename(path), hashlib.sha1(path.encode()).hexdigest()[:16]))
+
+
+def write_mesh_cache(cache_file: str, path: str, data: ObjData):
+    stat                = os.stat(path)
+    header              = np.zeros(1, dtype=CACHE_HEADER_DTYPE)
+    header["magic"]     = CACHE_MAGIC
+    header["version"]   = CACHE_VERSION
+    header["size"]      = stat.st_size
+    header["mtime_ns"]  = stat.st_mtime_ns
+    header["rows"]      = [len(data[name]) for name, _, _ in OBJ_ARRAYS]
+
+    # Write next to the final file first, readers never see partial caches
+    os.makedirs(os.path.dirname(cache_file) or ".", exist_ok=True)
+    temp_file = "{}.{}.tmp".format(cache_file, os.getpid())
+    with open(temp_file, "wb") as f:
+        f.write(header.tobytes())
+        for name, dtype, _ in OBJ_ARRAYS:
+            f.write(bytes(_align(f.tell()) - f.tell()))
+            f.write(np.ascontiguousarray(data[name], dtype=np.dtype(dtype).newbyteorder("<")).tobytes())
+    os.replace(temp_file, cache_file)
+
+
+def read_mesh_cache(cache_file: str, path: str) -> ObjData | None:
+    """Memory-map a mesh cache, None if it is missing or does not match size and mtime of the OBJ."""
+    if not os.path.exists(cache_file) or os.path.getsize(cache_file) < CACHE_HEADER_DTYPE.itemsize:
+        return None
+
+    buffer  = np.memmap(cache_file, dtype=np.uint8, mode="r")
+    header  = buffer[:CACHE_HEADER_DTYPE.itemsize].view(CACHE_HEADER_DTYPE)[0]
+    stat    = os.stat(path)
+    if header["magic"] != CACHE_MAGIC or header["version"] != CACHE_VERSION or \
+            header["size"] != stat.st_size or header["mtime_ns"] != stat.st_mtime_ns:
+        return None
+
+    data    = {}
+    offset  = CACHE_HEADER_DTYPE.itemsize
+    for (name, dtype, width), rows in zip(OBJ_ARRAYS, header["rows"].tolist()):
+        offset      = _align(offset)
+        nbytes      = rows * width * np.dtype(dtype).itemsize
+        if offset + nbytes > len(buffer):
+            return None
+        array       = buffer[offset:offset + nbytes].view(np.dtype(dtype).newbyteorder("<"))
+        data[name]  = array.reshape(-1, width) if width > 1 else array
+        offset      += nbytes
+    return data
+
+
+
+class OBJ_Parser:
+
+    def __init__(self, path, normalize = True, cache_dir = None):
+        self._parse(path, cache_dir)
+
+        if normalize:
+            self._normalize()
+
+
+    def _parse(self, path, cache_dir):
+
+        # Reuse the binary cache of an unchanged OBJ, else parse the text and refresh the cache
+        cache_file  = cache_path(cache_dir, path) if cache_dir else None
+        data        = read_mesh_cache(cache_file, path) if cache_file else None
+        if data is None:
+            data = read_obj(path)
+            if cache_file:
+                try:
+                    write_mesh_cache(cache_file, path, data)
+                except OSError as e:
+                    print("Could not write mesh cache '{}': {}".format(cache_file, e))
+
+        self.vertex_positions   = data["vertex_positions"]
+        self.vertex_indices     = data["vertex_indices"]
+        self.normals            = data["normals"]
+        self.normal_indices     = data["normal_indices"]
+        self.uv_positions       = data["uv_positions"]
+        self.uv_indices         = data["uv_indices"]
 
 
     def _normalize(self):
@@ -76,7 +259,7 @@ class OBJ_Parser:
 
     def get_vertex_data(self):
         return self.vertex_positions, self.vertex_indices
-    
+
 
     def get_normal_data(self):
         return self.normals, self.normal_indices
@@ -84,4 +267,3 @@ class OBJ_Parser:
 
     def get_uv_data(self):
         return self.uv_positions, self.uv_indices
-    
\ No newline at end of file
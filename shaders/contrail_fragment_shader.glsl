@@ -0,0 +1,16 @@
+#version 330 core
+
+in vec2 TexCoord;
+in float Alpha;
+
+out vec4 FragColor;
+
+uniform sampler2D texture1;
+
+void main()
+{
+    // Expired and unused segments
+    if (Alpha <= 0.0)
+        discard;
+    FragColor = vec4(1.0, 1.0, 1.0, Alpha) * texture(texture1, TexCoord);
+}
@@ -0,0 +1,19 @@
+#version 330 core
+layout(location = 0) in vec3 position;
+layout(location = 1) in vec2 texCoord;
+layout(location = 2) in float birth;
+
+uniform mat4 view;
+uniform mat4 projection;
+uniform float time;         // seconds
+uniform float life_time;    // seconds
+
+out vec2 TexCoord;
+out float Alpha;
+
+void main()
+{
+    gl_Position     = projection * view * vec4(position, 1.0);
+    TexCoord        = texCoord;
+    Alpha           = 1.0 - (time - birth) / life_time;
+}
@@ -0,0 +1,22 @@
+#version 330 core
+layout(location = 0) in vec3 position;
+layout(location = 1) in vec2 texCoord;
+layout(location = 2) in vec3 instancePosition;
+layout(location = 3) in vec3 instanceScale;
+
+uniform mat4 view;
+uniform mat4 projection;
+uniform float time;             // seconds
+uniform float rotation_speed;   // degrees per second around the z axis
+
+out vec2 TexCoord;
+
+void main()
+{
+    float angle     = radians(rotation_speed * time);
+    mat2 rotation   = mat2(cos(angle), sin(angle), -sin(angle), cos(angle));
+    vec3 local      = position * instanceScale;
+    local.xy        = rotation * local.xy;
+    gl_Position     = projection * view * vec4(instancePosition + local, 1.0);
+    TexCoord        = texCoord;
+}
@@ -0,0 +1,12 @@
+#version 330 core
+
+in vec3 TexCoord;
+
+out vec4 FragColor;
+
+uniform sampler2DArray tiles;
+
+void main()
+{
+    FragColor = texture(tiles, TexCoord);
+}
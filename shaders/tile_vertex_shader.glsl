@@ -0,0 +1,17 @@
+#version 330 core
+layout(location = 0) in vec3 position;
+layout(location = 1) in vec2 texCoord;
+layout(location = 2) in vec4 tileTransform;     // center (xy), scale (z) and texture layer (w)
+layout(location = 3) in vec4 tileUVRect;        // offset (xy) and scale (zw) of the texture region
+
+uniform mat4 view;
+uniform mat4 projection;
+
+out vec3 TexCoord;
+
+void main()
+{
+    vec3 world      = vec3(tileTransform.xy + position.xy * tileTransform.z, 0.0);
+    gl_Position     = projection * view * vec4(world, 1.0);
+    TexCoord        = vec3(tileUVRect.xy + texCoord * tileUVRect.zw, tileTransform.w);
+}